@@ -37,9 +37,17 @@ class Settings(BaseSettings):
     # Nexon Open API (optional - for character data fetching, KMS only)
     nexon_api_key: str = ""
     nexon_api_base_url: str = "https://open.api.nexon.com"
+    # Connection pool ceiling for the Nexon client; keep below the point
+    # where concurrent calls just turn into Nexon 429s
+    nexon_max_connections: int = 200
+    # Client-side request pacing; stay under Nexon's published per-key limit
+    nexon_rate_per_sec: float = 5.0
     
     # MapleStory Network API (optional - for GMS character data fetching)
     maplestory_network_token: str = ""
+    # Probe API root/docs endpoints during discovery (debug aid; costs ~42
+    # extra HTTP requests per cold lookup, so keep off in production)
+    debug_discover_endpoints: bool = False
 
     @property
     def cors_origins(self) -> list[str]:
@@ -23,6 +23,9 @@ from app.routers import (
 )
 from app.routers.character_xp import router as character_xp_router
 from app.redis import init_redis, close_redis, redis_client
+from app.services.maplestory_network_api import close_maplestory_network_client
+from app.services.nexon_api import close_nexon_client
+from app.services.nexon_rankings_scraper import close_nexon_rankings_client
 
 
 @asynccontextmanager
@@ -38,6 +41,9 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    await close_maplestory_network_client()
+    await close_nexon_client()
+    await close_nexon_rankings_client()
     await close_redis()
     print("Redis disconnected")
 
@@ -3,31 +3,51 @@ Redis client for GMSTracker.
 Used for sessions, caching, and rate limiting.
 """
 
-from redis.asyncio import Redis, from_url
+import socket
+
+from redis.asyncio import ConnectionPool, Redis
 
 from app.config import settings
 
-# Global Redis client (initialized on startup)
+# Global Redis client and its pool (initialized on startup). All services
+# (sessions, rate limiting, caches) share this one pool.
 redis_client: Redis | None = None
+_pool: ConnectionPool | None = None
 
 
 async def init_redis() -> Redis:
     """Initialize Redis connection."""
-    global redis_client
-    redis_client = await from_url(
+    global redis_client, _pool
+    _pool = ConnectionPool.from_url(
         settings.redis_url,
+        # Well past the knee for a single worker; commands pipeline over a
+        # few connections rather than opening one per concurrent request
+        max_connections=16,
+        socket_keepalive=True,
+        socket_keepalive_options={
+            socket.TCP_KEEPIDLE: 60,
+            socket.TCP_KEEPINTVL: 10,
+            socket.TCP_KEEPCNT: 3,
+        },
+        health_check_interval=30,
+        retry_on_timeout=True,
         encoding="utf-8",
         decode_responses=True,
     )
+    redis_client = Redis(connection_pool=_pool)
+    await redis_client.ping()
     return redis_client
 
 
 async def close_redis() -> None:
     """Close Redis connection."""
-    global redis_client
+    global redis_client, _pool
     if redis_client:
         await redis_client.close()
         redis_client = None
+    if _pool:
+        await _pool.disconnect()
+        _pool = None
 
 
 def get_redis() -> Redis:
@@ -41,16 +61,22 @@ def get_redis() -> Redis:
 class RedisKeys:
     """Redis key prefixes for different data types."""
 
-    SESSION = "session:"          # User sessions
-    RATE_LIMIT = "ratelimit:"     # Rate limiting counters
-    CACHE = "cache:"              # General cache
-    JOB = "job:"                  # Background job data
+    SESSION = "session:"                # User sessions
+    USER_SESSIONS = "user_sessions:"    # Per-user index of session tokens
+    RATE_LIMIT = "ratelimit:"           # Rate limiting counters
+    CACHE = "cache:"                    # General cache
+    JOB = "job:"                        # Background job data
 
     @classmethod
     def session(cls, session_id: str) -> str:
         """Get session key."""
         return f"{cls.SESSION}{session_id}"
 
+    @classmethod
+    def user_sessions(cls, discord_id: str) -> str:
+        """Get the per-user session index key."""
+        return f"{cls.USER_SESSIONS}{discord_id}"
+
     @classmethod
     def rate_limit(cls, identifier: str, endpoint: str) -> str:
         """Get rate limit key."""
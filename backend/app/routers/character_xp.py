@@ -258,7 +258,7 @@ async def get_characters_xp_overview(
         xp_table = load_xp_table()
         # Precompute cumulative XP start per level
         cumulative_xp = {}
-        running = Decimal('0')
+        running = 0.0
         for lvl in sorted(xp_table.keys()):
             cumulative_xp[lvl] = running
             running += xp_table[lvl]['actual']
@@ -356,17 +356,17 @@ async def get_characters_xp_overview(
             if lvl in xp_table and lvl in cumulative_xp:
                 xp_required = xp_table[lvl]['actual']
                 start_xp = cumulative_xp[lvl]
-                within_level = latest_snapshot.total_xp - start_xp
+                within_level = float(latest_snapshot.total_xp) - start_xp
                 if xp_required > 0:
-                    pct = (within_level / xp_required) * Decimal('100')
+                    pct = (within_level / xp_required) * 100.0
                     if pct < 0:
-                        pct = Decimal('0')
+                        pct = 0.0
                     if pct > 100:
-                        pct = Decimal('100')
+                        pct = 100.0
                     progress_percent = pct
         # Fallback: if no XP table, just default to 100% so UI shows something
         elif latest_snapshot:
-            progress_percent = Decimal('100')
+            progress_percent = 100.0
         
         overviews.append(CharacterXPOverview(
             character_id=character.id,
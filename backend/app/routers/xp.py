@@ -65,9 +65,9 @@ async def create_xp_entry(
                 detail=f"Epic Dungeon XP not available for level {data.level}"
             )
     
-    # Calculate total daily XP
-    total_trillions = xp_gained['trillions'] + (epic_dungeon_xp_trillions or Decimal('0'))
-    total_billions = xp_gained['billions'] + (epic_dungeon_xp_billions or Decimal('0'))
+    # Calculate total daily XP (xp_gained values are floats)
+    total_trillions = xp_gained['trillions'] + float(epic_dungeon_xp_trillions or 0)
+    total_billions = xp_gained['billions'] + float(epic_dungeon_xp_billions or 0)
     
     # Check if entry already exists for this date
     existing = await db.scalar(
@@ -254,9 +254,10 @@ async def update_xp_entry(
             entry.epic_dungeon_xp_trillions = None
             entry.epic_dungeon_xp_billions = None
     
-    # Recalculate total
-    entry.total_daily_xp_trillions = entry.xp_gained_trillions + (entry.epic_dungeon_xp_trillions or Decimal('0'))
-    entry.total_daily_xp_billions = entry.xp_gained_billions + (entry.epic_dungeon_xp_billions or Decimal('0'))
+    # Recalculate total; xp_gained may be a fresh float while the epic
+    # dungeon values can still be Decimals loaded from the database
+    entry.total_daily_xp_trillions = float(entry.xp_gained_trillions) + float(entry.epic_dungeon_xp_trillions or 0)
+    entry.total_daily_xp_billions = float(entry.xp_gained_billions) + float(entry.epic_dungeon_xp_billions or 0)
     
     await db.commit()
     await db.refresh(entry)
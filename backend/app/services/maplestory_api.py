@@ -3,11 +3,19 @@ MapleStory.io API client for fetching sprites, images, and game data.
 Public API - no authentication required.
 """
 
-import httpx
+import time
+from collections import OrderedDict
 from typing import Optional
 
+import httpx
+import orjson
+
 MAPLESTORY_IO_BASE = "https://maplestory.io/api"
 
+# Item metadata on maplestory.io is immutable for a given version, so cached
+# entries never go stale unless a TTL is explicitly requested.
+ITEM_INFO_CACHE_MAXSIZE = 4096
+
 
 class MapleStoryAPIError(Exception):
     """Error when calling MapleStory.io API."""
@@ -20,9 +28,19 @@ class MapleStoryAPIClient:
     Used to fetch item sprites, boss images, character renders, etc.
     """
 
-    def __init__(self, base_url: str = MAPLESTORY_IO_BASE):
+    def __init__(
+        self,
+        base_url: str = MAPLESTORY_IO_BASE,
+        item_info_ttl_seconds: Optional[float] = None,
+    ):
         self.base_url = base_url
         self.client = httpx.AsyncClient(timeout=10.0)
+        # LRU cache of (item_id, region, version) -> (expiry, parsed JSON).
+        # expiry is None when no TTL is configured (cache forever).
+        self.item_info_ttl_seconds = item_info_ttl_seconds
+        self._item_info_cache: OrderedDict[
+            tuple[int, str, str], tuple[Optional[float], Optional[dict]]
+        ] = OrderedDict()
 
     async def get_item_sprite(
         self,
@@ -132,16 +150,45 @@ class MapleStoryAPIClient:
         Returns:
             Item information dict or None if not found
         """
+        key = (item_id, region, version)
+        cached = self._item_info_cache.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if expires_at is None or time.monotonic() < expires_at:
+                self._item_info_cache.move_to_end(key)
+                return value
+            del self._item_info_cache[key]
+
         try:
             url = f"{self.base_url}/{region}/{version}/item/{item_id}"
             response = await self.client.get(url)
             response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError:
+            info = orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            # Cache known-missing IDs too so we don't hammer the upstream
+            if e.response.status_code == 404:
+                self._cache_item_info(key, None)
             return None
         except httpx.RequestError as e:
             raise MapleStoryAPIError(f"Failed to fetch item info: {e}")
 
+        self._cache_item_info(key, info)
+        return info
+
+    def _cache_item_info(
+        self, key: tuple[int, str, str], value: Optional[dict]
+    ) -> None:
+        """Store a parsed item payload, evicting the least recently used entry."""
+        expires_at = (
+            time.monotonic() + self.item_info_ttl_seconds
+            if self.item_info_ttl_seconds
+            else None
+        )
+        self._item_info_cache[key] = (expires_at, value)
+        self._item_info_cache.move_to_end(key)
+        if len(self._item_info_cache) > ITEM_INFO_CACHE_MAXSIZE:
+            self._item_info_cache.popitem(last=False)
+
     def get_item_sprite_url(
         self,
         item_id: int,
@@ -3,13 +3,29 @@ MapleStory Network API client for fetching GMS character data.
 Uses OAuth JWT token for authentication.
 """
 
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
 import httpx
-import json
-from typing import Optional
+import orjson
 
 from app.config import settings
 
 
+# Debug diagnostics go through the logging framework instead of synchronous
+# file writes, so the event loop is never blocked on disk I/O.
+logger = logging.getLogger("ms_net")
+
+
+def _dbg(message: str, **data) -> None:
+    """Emit a debug line; skips payload formatting entirely when DEBUG is off."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s %s", message, data)
+
+
 # Try different possible base URLs
 # Based on research: maplestory.net has a /develop section and uses OAuth
 # The API might be at different locations
@@ -24,6 +40,150 @@ MAPLESTORY_NETWORK_API_BASE_OPTIONS = [
 ]
 MAPLESTORY_NETWORK_API_BASE = MAPLESTORY_NETWORK_API_BASE_OPTIONS[0]  # Default to first option
 
+# Endpoint discovery is expensive (up to ~280 sequential probes), so the first
+# (base_url, endpoint_template, auth_method) combination that returns 200 is
+# memoized for the process lifetime and persisted to disk so restarts don't
+# re-probe. Steady-state lookups then issue a single request.
+_DISCOVERY_CACHE_PATH = "/app/.ms_discovered.json"
+# Keep concurrent discovery probes under the httpx connection pool limit
+DISCOVERY_CONCURRENCY = 32
+
+# Discovery probes hit mostly-dead endpoints, so they should fail fast instead
+# of spending the full request budget on a slow handshake. The known-good
+# endpoint and GraphQL attempts keep the looser default.
+PROBE_TIMEOUT = httpx.Timeout(connect=2.0, read=3.0, write=3.0, pool=1.0)
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=3.0, read=8.0)
+_discovered: Optional[Tuple[str, str, str]] = None
+_discovery_lock = asyncio.Lock()
+
+# Character level/job change on minute-to-hour timescales, so successful
+# lookups are cached briefly to absorb page reloads. Misses get a much
+# shorter TTL so typos don't hammer the API but corrections aren't delayed.
+LOOKUP_CACHE_TTL = 60.0
+LOOKUP_NEGATIVE_TTL = 5.0
+LOOKUP_CACHE_MAXSIZE = 4096
+
+# A 401/403 means the token itself is bad, so no other candidate can succeed.
+# Remember the rejection briefly so concurrent callers fail fast instead of
+# re-running the probe sweep with the same broken token.
+TOKEN_BAD_BACKOFF = 60.0
+_token_bad_until = 0.0
+
+
+def _mark_token_bad() -> None:
+    global _token_bad_until
+    _token_bad_until = time.monotonic() + TOKEN_BAD_BACKOFF
+
+
+def _load_discovered() -> Optional[Tuple[str, str, str]]:
+    """Get the memoized working endpoint, falling back to the on-disk cache."""
+    global _discovered
+    if _discovered is None:
+        try:
+            with open(_DISCOVERY_CACHE_PATH, "rb") as f:
+                cached = orjson.loads(f.read())
+            _discovered = (
+                cached["base_url"],
+                cached["endpoint_template"],
+                cached["auth_method"],
+            )
+        except Exception:
+            pass
+    return _discovered
+
+
+def _save_discovered(base_url: str, endpoint_template: str, auth_method: str) -> None:
+    """Memoize the working endpoint and persist it across restarts."""
+    global _discovered
+    _discovered = (base_url, endpoint_template, auth_method)
+    try:
+        with open(_DISCOVERY_CACHE_PATH, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    {
+                        "base_url": base_url,
+                        "endpoint_template": endpoint_template,
+                        "auth_method": auth_method,
+                    }
+                )
+            )
+    except Exception:
+        pass
+
+
+# Candidate endpoints are constant data; the character-specific values are
+# substituted in when the params dicts are materialized per lookup.
+# Based on API docs, GMS uses version=220, subversion=0, locale=0.
+_VERSION_PARAMS = (("version", 220), ("subversion", 0), ("locale", 0))
+_ENDPOINT_FORMATS: Tuple[Tuple[str, Tuple[Tuple[str, object], ...]], ...] = (
+    # Profile/character endpoints (most common)
+    ("/api/profiles/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/api/profile/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/api/characters/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/api/character/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    # Query parameter variants
+    ("/api/profiles", (("character_name", "{name}"), ("world", "{world}")) + _VERSION_PARAMS),
+    ("/api/characters", (("name", "{name}"), ("world", "{world}")) + _VERSION_PARAMS),
+    ("/api/character", (("name", "{name}"), ("world", "{world}")) + _VERSION_PARAMS),
+    # v1 API versions
+    ("/api/v1/profiles/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/api/v1/characters/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/api/v1/character/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    # Without /api prefix
+    ("/profiles/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/characters/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/character/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    # Digits-specific endpoints (maplestory.net/digits feature)
+    ("/api/digits/character/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    ("/digits/api/character/{name}", (("world", "{world}"),) + _VERSION_PARAMS),
+    # Also try without version params (API might default to GMS)
+    ("/api/profiles/{name}", (("world", "{world}"),)),
+    ("/api/characters/{name}", (("world", "{world}"),)),
+    ("/api/character/{name}", (("world", "{world}"),)),
+    ("/api/characters", (("name", "{name}"), ("world", "{world}"))),
+)
+
+
+# Key aliases tried in order when normalizing an upstream payload (REST and
+# GraphQL responses use different field names for the same data)
+_NAME_KEYS = ("name", "character_name")
+_WORLD_KEYS = ("world", "world_name")
+_LEVEL_KEYS = ("level", "character_level")
+_JOB_KEYS = ("job", "character_class", "characterClass", "class")
+_IMAGE_KEYS = ("character_image", "image_url", "avatar_url", "image", "icon")
+_OCID_KEYS = ("ocid", "id")
+
+
+def _first_of(data: dict, keys: Tuple[str, ...]):
+    for key in keys:
+        value = data.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _normalize_character_payload(data: dict, character_name: str, world: str) -> dict:
+    """Map an upstream payload to our expected response format."""
+    name = _first_of(data, _NAME_KEYS) or character_name
+    world_name = _first_of(data, _WORLD_KEYS) or world
+    level = _first_of(data, _LEVEL_KEYS)
+    job = _first_of(data, _JOB_KEYS)
+    image = _first_of(data, _IMAGE_KEYS)
+    ocid = _first_of(data, _OCID_KEYS)
+    return {
+        "character_name": name,
+        "world": world_name,
+        "world_name": world_name,
+        "level": level,
+        "character_level": level,
+        "job": job,
+        "character_class": job,
+        "character_image": image,
+        "character_icon_url": image,
+        "ocid": ocid,
+        "nexon_ocid": None,
+    }
+
 
 class MapleStoryNetworkAPIError(Exception):
     """Error when calling MapleStory Network API."""
@@ -42,22 +202,170 @@ class MapleStoryNetworkAPIClient:
             raise MapleStoryNetworkAPIError(
                 "MapleStory Network access token not configured. Set MAPLESTORY_NETWORK_TOKEN in environment."
             )
-
-    def _get_headers(self) -> dict:
-        """Get headers for API requests."""
-        return {
+        self._client: Optional[httpx.AsyncClient] = None
+        # Headers only depend on the token, so build both auth variants once
+        # here instead of re-copying dicts on every probe iteration.
+        self._headers_with_auth = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json",
         }
+        self._headers_without_auth = {"Content-Type": "application/json"}
+        self._auth_query_params = {
+            "token": self.access_token,
+            "access_token": self.access_token,
+            "api_key": self.access_token,
+        }
+        self._auth_variant_pairs = (
+            ("header", self._headers_with_auth, {}),
+            ("query", self._headers_without_auth, self._auth_query_params),
+        )
+        # LRU of (name, world) -> (expiry, result); result None == cached miss
+        self._lookup_cache: OrderedDict[
+            tuple[str, str], tuple[float, Optional[dict]]
+        ] = OrderedDict()
+        # In-flight lookups by key; concurrent callers for the same character
+        # await the first caller's future instead of duplicating the request
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared pooled HTTP client, reused across lookups."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                http2=True,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_headers(self) -> dict:
+        """Get headers for API requests."""
+        return self._headers_with_auth
+
+    def _auth_variants(self) -> tuple[tuple[str, dict, dict], ...]:
+        """Auth variants to try: bearer header vs token as query parameter."""
+        return self._auth_variant_pairs
+
+    def _endpoint_formats(self, character_name: str, world: str) -> list[tuple[str, dict]]:
+        """Materialize the candidate (endpoint_template, params) pairs for a lookup."""
+        subst = {"{name}": character_name, "{world}": world}
+        return [
+            (template, {key: subst.get(value, value) for key, value in param_pairs})
+            for template, param_pairs in _ENDPOINT_FORMATS
+        ]
+
+    async def _probe_endpoint(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        endpoint_template: str,
+        params: dict,
+        req_headers: dict,
+        auth_params: dict,
+        auth_method: str,
+        character_name: str,
+        world: str,
+        timeout: httpx.Timeout = PROBE_TIMEOUT,
+    ) -> tuple[Optional[dict], Optional[str]]:
+        """
+        Probe one endpoint candidate.
+        Returns (result, error): result is the normalized character dict on 200,
+        error is a short description for non-404 failures.
+        """
+        try:
+            if "{name}" in endpoint_template:
+                url = f"{base_url}{endpoint_template.format(name=character_name)}"
+            else:
+                url = f"{base_url}{endpoint_template}"
+
+            # Merge auth params with regular params
+            all_params = {**params, **auth_params}
+
+            _dbg("Trying API endpoint", base_url=base_url, endpoint=endpoint_template, url=url, auth_method=auth_method)
+
+            response = await client.get(url, params=all_params, headers=req_headers, follow_redirects=True, timeout=timeout)
+
+            _dbg("API response", status_code=response.status_code, url=str(response.url))
+
+            if response.status_code == 200:
+                # Success! Parse, remember the working endpoint, and return
+                data = orjson.loads(response.content)
+
+                _dbg("Found working endpoint", base_url=base_url, endpoint=endpoint_template, auth_method=auth_method)
+
+                _save_discovered(base_url, endpoint_template, auth_method)
+
+                return _normalize_character_payload(data, character_name, world), None
+            elif response.status_code in (401, 403):
+                # The token is invalid; no other candidate can succeed either
+                _mark_token_bad()
+                raise MapleStoryNetworkAPIError(
+                    f"Invalid MapleStory Network token (status {response.status_code})"
+                )
+            elif response.status_code != 404:
+                # Non-404 error, might be auth or other issue
+                # Decode only the snippet we keep instead of the whole body
+                snippet = response.content[:200].decode("utf-8", errors="replace")
+                return None, f"Status {response.status_code}: {snippet}"
+        except httpx.HTTPStatusError as e:
+            _dbg("HTTPStatusError for endpoint", status_code=e.response.status_code, url=str(e.response.url))
+
+            if e.response.status_code == 200:
+                # Should have been caught above, but just in case
+                data = orjson.loads(e.response.content)
+                _save_discovered(base_url, endpoint_template, auth_method)
+                return _normalize_character_payload(data, character_name, world), None
+            elif e.response.status_code in (401, 403):
+                _mark_token_bad()
+                raise MapleStoryNetworkAPIError(
+                    f"Invalid MapleStory Network token (status {e.response.status_code})"
+                )
+            elif e.response.status_code != 404:
+                snippet = e.response.content[:200].decode("utf-8", errors="replace")
+                return None, f"Status {e.response.status_code}: {snippet}"
+        except MapleStoryNetworkAPIError:
+            raise
+        except Exception as ex:
+            _dbg("Exception during API call", error_type=type(ex).__name__, error=str(ex))
+        return None, None
+
+    async def _lookup_via_discovered(
+        self,
+        client: httpx.AsyncClient,
+        discovered: Tuple[str, str, str],
+        headers: dict,
+        character_name: str,
+        world: str,
+    ) -> Optional[dict]:
+        """Use the previously discovered endpoint, skipping the probe sweep."""
+        base_url, endpoint_template, auth_method = discovered
+        for method, req_headers, auth_params in self._auth_variants():
+            if method != auth_method:
+                continue
+            for template, params in self._endpoint_formats(character_name, world):
+                if template != endpoint_template:
+                    continue
+                result, _ = await self._probe_endpoint(
+                    client, base_url, template, params, req_headers, auth_params,
+                    method, character_name, world, timeout=DEFAULT_TIMEOUT,
+                )
+                if result is not None:
+                    return result
+        return None
 
     async def lookup_character(self, character_name: str, world: str) -> dict:
         """
         Look up character data from MapleStory Network API.
-        
+
         Args:
             character_name: Character name
             world: World/server name (e.g., "Scania", "Bera")
-        
+
         Returns:
             Dictionary with character data:
             - character_name: str
@@ -66,288 +374,253 @@ class MapleStoryNetworkAPIClient:
             - job: str
             - character_image: str (URL)
             - etc.
-        
+
         Raises:
             MapleStoryNetworkAPIError: If API call fails
         """
-        # #region agent log
-        try:
-            with open("/app/debug.log", "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"maplestory_network_api.py:40","message":"lookup_character entry","data":{"character_name":character_name,"world":world,"base_url":MAPLESTORY_NETWORK_API_BASE,"has_token":bool(self.access_token)},"timestamp":int(__import__("time").time()*1000)})+"\n")
-        except Exception:
-            pass
-        # #endregion
-        
+        _dbg("lookup_character entry", character_name=character_name, world=world, has_token=bool(self.access_token))
+
         if not self.access_token:
             raise MapleStoryNetworkAPIError("MapleStory Network access token not configured")
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = self._get_headers()
-            last_error = None
-            
-            # First, try to access API documentation or root endpoint to understand structure
-            # #region agent log
-            try:
-                with open("/app/debug.log", "a", encoding="utf-8") as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"O","location":"maplestory_network_api.py:70","message":"Testing API root/documentation endpoints","data":{},"timestamp":int(__import__("time").time()*1000)})+"\n")
-            except Exception:
-                pass
-            # #endregion
-            
-            # Try to get API info/documentation and follow redirects
+        key = (character_name.lower(), world.lower())
+        cached = self._lookup_cache.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if time.monotonic() < expires_at:
+                self._lookup_cache.move_to_end(key)
+                if value is None:
+                    raise MapleStoryNetworkAPIError(
+                        f"Character '{character_name}' on {world} not found (cached)"
+                    )
+                return value
+            del self._lookup_cache[key]
+
+        # Coalesce concurrent lookups: only the first caller hits the network,
+        # everyone else awaits its future (dogpile protection on cache expiry)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await inflight
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._lookup_uncached(character_name, world)
+        except MapleStoryNetworkAPIError as exc:
+            self._cache_lookup(key, None, LOOKUP_NEGATIVE_TTL)
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited future doesn't warn on GC
+            future.exception()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._cache_lookup(key, result, LOOKUP_CACHE_TTL)
+        future.set_result(result)
+        return result
+
+    def _cache_lookup(
+        self, key: tuple[str, str], result: Optional[dict], ttl: float
+    ) -> None:
+        """Store a lookup result with a TTL, evicting the least recently used."""
+        self._lookup_cache[key] = (time.monotonic() + ttl, result)
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > LOOKUP_CACHE_MAXSIZE:
+            self._lookup_cache.popitem(last=False)
+
+    async def _lookup_uncached(self, character_name: str, world: str) -> dict:
+        """Run the actual network lookup via the discovered endpoint or a full sweep."""
+        if time.monotonic() < _token_bad_until:
+            raise MapleStoryNetworkAPIError(
+                "MapleStory Network token was recently rejected; skipping lookup"
+            )
+
+        client = self._get_client()
+        headers = self._get_headers()
+
+        # Fast path: reuse the endpoint discovered by a previous lookup
+        discovered = _load_discovered()
+        if discovered is not None:
+            result = await self._lookup_via_discovered(
+                client, discovered, headers, character_name, world
+            )
+            if result is not None:
+                return result
+            # Discovered endpoint stopped answering; fall through and re-probe
+
+        async with _discovery_lock:
+            # A concurrent caller may have finished discovery while we waited
+            if _discovered is not None and _discovered != discovered:
+                result = await self._lookup_via_discovered(
+                    client, _discovered, headers, character_name, world
+                )
+                if result is not None:
+                    return result
+            return await self._discover_character(client, headers, character_name, world)
+
+    async def _discover_character(
+        self,
+        client: httpx.AsyncClient,
+        headers: dict,
+        character_name: str,
+        world: str,
+    ) -> dict:
+        """
+        Full discovery sweep: probe every base URL / endpoint / auth combination
+        until one answers. Only runs when no working endpoint is memoized.
+        """
+        last_error = None
+
+        # Optionally probe API documentation/root endpoints to understand the
+        # structure and learn which base URL is actually alive. This sweep only
+        # exists to aid offline endpoint research, so it is disabled by default
+        # — in production it was ~42 dead requests per cold lookup.
+        live_base_url = None
+        if settings.debug_discover_endpoints:
+            _dbg("Testing API root/documentation endpoints")
+
             for base_url in MAPLESTORY_NETWORK_API_BASE_OPTIONS:
                 for test_path in ["/", "/api", "/api/v1", "/develop", "/docs", "/documentation"]:
                     try:
                         test_url = f"{base_url}{test_path}"
-                        test_response = await client.get(test_url, headers=headers, follow_redirects=True)
-                        # #region agent log
-                        try:
-                            with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                redirect_url = str(test_response.url) if hasattr(test_response, 'url') else test_url
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run4","hypothesisId":"P","location":"maplestory_network_api.py:95","message":"Testing API info endpoint","data":{"url":test_url,"status_code":test_response.status_code,"final_url":redirect_url},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                        except Exception:
-                            pass
-                        # #endregion
-                        if test_response.status_code == 200:
-                            # Found something useful
-                            pass
+                        test_response = await client.get(test_url, headers=headers, follow_redirects=True, timeout=PROBE_TIMEOUT)
+                        _dbg("API info endpoint", url=test_url, status_code=test_response.status_code, final_url=str(test_response.url))
+                        if test_response.status_code == 200 and live_base_url is None:
+                            live_base_url = base_url
                     except:
                         pass
-            
-            # First, try to get API version info to understand the structure
+
+            # Also check the /version/default endpoint for structure hints
             # Based on research: API uses version=220, subversion=0, locale=0 for GMS
-            # There's a /version/default endpoint that might help
             for base_url in MAPLESTORY_NETWORK_API_BASE_OPTIONS:
                 try:
                     version_url = f"{base_url}/version/default"
-                    version_response = await client.get(version_url, headers=headers, follow_redirects=True)
+                    version_response = await client.get(version_url, headers=headers, follow_redirects=True, timeout=PROBE_TIMEOUT)
                     if version_response.status_code == 200:
-                        version_data = version_response.json()
-                        # Log version info for debugging
-                        try:
-                            with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run5","hypothesisId":"V","location":"maplestory_network_api.py:115","message":"Found version endpoint","data":{"base_url":base_url,"version_data":version_data},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                        except Exception:
-                            pass
+                        version_data = orjson.loads(version_response.content)
+                        _dbg("Found version endpoint", base_url=base_url, version_data=version_data)
                 except Exception:
                     pass
-            
-            # Try GraphQL endpoint first (some modern APIs use GraphQL)
-            graphql_endpoints = [
-                "/graphql",
-                "/api/graphql",
-                "/api/v1/graphql",
-                "/develop/api/graphql",
-            ]
-            
-            for base_url in MAPLESTORY_NETWORK_API_BASE_OPTIONS:
-                for graphql_path in graphql_endpoints:
-                    try:
-                        graphql_url = f"{base_url}{graphql_path}"
-                        # Try a GraphQL query for character lookup
-                        graphql_query = {
-                            "query": """
-                                query GetCharacter($name: String!, $world: String!) {
-                                    character(name: $name, world: $world) {
-                                        name
-                                        world
-                                        level
-                                        job
-                                        characterClass
-                                        image
-                                        icon
-                                    }
+
+        # Try GraphQL (some modern APIs use it), but only against the base URL
+        # that actually answered above — probing all 7 bases x 4 paths was 28
+        # POSTs each carrying the full query body.
+        if live_base_url is not None:
+            for graphql_path in ["/graphql", "/api/graphql"]:
+                try:
+                    graphql_url = f"{live_base_url}{graphql_path}"
+                    # Try a GraphQL query for character lookup
+                    graphql_query = {
+                        "query": """
+                            query GetCharacter($name: String!, $world: String!) {
+                                character(name: $name, world: $world) {
+                                    name
+                                    world
+                                    level
+                                    job
+                                    characterClass
+                                    image
+                                    icon
                                 }
-                            """,
-                            "variables": {
-                                "name": character_name,
-                                "world": world
                             }
+                        """,
+                        "variables": {
+                            "name": character_name,
+                            "world": world
                         }
-                        graphql_response = await client.post(
-                            graphql_url,
-                            json=graphql_query,
-                            headers=headers,
-                            follow_redirects=True
-                        )
-                        if graphql_response.status_code == 200:
-                            graphql_data = graphql_response.json()
-                            if "data" in graphql_data and graphql_data.get("data", {}).get("character"):
-                                char_data = graphql_data["data"]["character"]
-                                result = {
-                                    "character_name": char_data.get("name") or character_name,
-                                    "world": char_data.get("world") or world,
-                                    "world_name": char_data.get("world") or world,
-                                    "level": char_data.get("level"),
-                                    "character_level": char_data.get("level"),
-                                    "job": char_data.get("job") or char_data.get("characterClass"),
-                                    "character_class": char_data.get("job") or char_data.get("characterClass"),
-                                    "character_image": char_data.get("image") or char_data.get("icon"),
-                                    "character_icon_url": char_data.get("image") or char_data.get("icon"),
-                                    "ocid": None,
-                                    "nexon_ocid": None,
-                                }
-                                return result
-                    except Exception:
-                        pass
-            
-            # Try different base URLs and endpoint formats
-            # Based on API docs, GMS uses version=220, subversion=0, locale=0
-            # Common patterns for character/profile APIs:
-            endpoint_formats = [
-                # Profile/character endpoints (most common)
-                ("/api/profiles/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/profile/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/characters/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/character/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                # Query parameter variants
-                ("/api/profiles", {"character_name": character_name, "world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/characters", {"name": character_name, "world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/character", {"name": character_name, "world": world, "version": 220, "subversion": 0, "locale": 0}),
-                # v1 API versions
-                ("/api/v1/profiles/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/v1/characters/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/api/v1/character/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                # Without /api prefix
-                ("/profiles/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/characters/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/character/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                # Digits-specific endpoints (maplestory.net/digits feature)
-                ("/api/digits/character/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                ("/digits/api/character/{name}", {"world": world, "version": 220, "subversion": 0, "locale": 0}),
-                # Also try without version params (API might default to GMS)
-                ("/api/profiles/{name}", {"world": world}),
-                ("/api/characters/{name}", {"world": world}),
-                ("/api/character/{name}", {"world": world}),
-                ("/api/characters", {"name": character_name, "world": world}),
-            ]
-            
-            # Also try with token as query parameter
-            auth_variants = [
-                ("header", headers, {}),
-                ("query", {k: v for k, v in headers.items() if k != "Authorization"}, {"token": self.access_token, "access_token": self.access_token, "api_key": self.access_token}),
-            ]
-            
-            for base_url in MAPLESTORY_NETWORK_API_BASE_OPTIONS:
-                for auth_method, req_headers, auth_params in auth_variants:
-                    for endpoint_template, params in endpoint_formats:
-                        try:
-                            if "{name}" in endpoint_template:
-                                url = f"{base_url}{endpoint_template.format(name=character_name)}"
-                            else:
-                                url = f"{base_url}{endpoint_template}"
-                            
-                            # Merge auth params with regular params
-                            all_params = {**params, **auth_params}
-                            
-                            # #region agent log
-                            try:
-                                with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"Q","location":"maplestory_network_api.py:110","message":"Trying API endpoint with auth variant","data":{"base_url":base_url,"endpoint":endpoint_template,"url":url,"params":all_params,"auth_method":auth_method},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                            except Exception:
-                                pass
-                            # #endregion
-                            
-                            response = await client.get(url, params=all_params, headers=req_headers, follow_redirects=True)
-                            
-                            # #region agent log
-                            try:
-                                with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                    try:
-                                        resp_text = response.text[:1000] if hasattr(response, 'text') and response.text else (str(response.content[:1000]) if hasattr(response, 'content') else "no response body")
-                                        resp_headers = dict(response.headers) if hasattr(response, 'headers') else {}
-                                    except Exception as ex:
-                                        resp_text = f"unable to read response: {ex}"
-                                        resp_headers = {}
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"K","location":"maplestory_network_api.py:148","message":"API response","data":{"status_code":response.status_code,"url":str(response.url),"response_body":resp_text,"response_headers":resp_headers},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                            except Exception:
-                                pass
-                            # #endregion
-                            
-                            if response.status_code == 200:
-                                # Success! Parse and return
-                                data = response.json()
-                                
-                                # #region agent log
-                                try:
-                                    with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                        f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"L","location":"maplestory_network_api.py:165","message":"Success! Found working endpoint","data":{"base_url":base_url,"endpoint":endpoint_template,"data_keys":list(data.keys()) if isinstance(data, dict) else "not_dict"},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                                except Exception:
-                                    pass
-                                # #endregion
-                                
-                                # Map response to our expected format
-                                result = {
-                                    "character_name": data.get("name") or data.get("character_name") or character_name,
-                                    "world": data.get("world") or data.get("world_name") or world,
-                                    "world_name": data.get("world") or data.get("world_name") or world,
-                                    "level": data.get("level") or data.get("character_level"),
-                                    "character_level": data.get("level") or data.get("character_level"),
-                                    "job": data.get("job") or data.get("character_class") or data.get("class"),
-                                    "character_class": data.get("job") or data.get("character_class") or data.get("class"),
-                                    "character_image": data.get("character_image") or data.get("image_url") or data.get("avatar_url"),
-                                    "character_icon_url": data.get("character_image") or data.get("image_url") or data.get("avatar_url"),
-                                    "ocid": data.get("ocid") or data.get("id"),
-                                    "nexon_ocid": None,
-                                }
-                                return result
-                            elif response.status_code != 404:
-                                # Non-404 error, might be auth or other issue
-                                last_error = f"Status {response.status_code}: {response.text[:200] if hasattr(response, 'text') else 'unknown'}"
-                        except httpx.HTTPStatusError as e:
-                            # #region agent log
-                            try:
-                                with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                    try:
-                                        error_body = e.response.text[:1000] if hasattr(e.response, 'text') and e.response.text else (str(e.response.content[:1000]) if hasattr(e.response, 'content') else "no error body")
-                                    except Exception:
-                                        error_body = "unable to read error"
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"M","location":"maplestory_network_api.py:193","message":"HTTPStatusError for endpoint","data":{"status_code":e.response.status_code,"url":str(e.response.url),"error_body":error_body},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                            except Exception:
-                                pass
-                            # #endregion
-                            
-                            if e.response.status_code == 200:
-                                # Should have been caught above, but just in case
-                                data = e.response.json()
-                                result = {
-                                    "character_name": data.get("name") or data.get("character_name") or character_name,
-                                    "world": data.get("world") or data.get("world_name") or world,
-                                    "world_name": data.get("world") or data.get("world_name") or world,
-                                    "level": data.get("level") or data.get("character_level"),
-                                    "character_level": data.get("level") or data.get("character_level"),
-                                    "job": data.get("job") or data.get("character_class") or data.get("class"),
-                                    "character_class": data.get("job") or data.get("character_class") or data.get("class"),
-                                    "character_image": data.get("character_image") or data.get("image_url") or data.get("avatar_url"),
-                                    "character_icon_url": data.get("character_image") or data.get("image_url") or data.get("avatar_url"),
-                                    "ocid": data.get("ocid") or data.get("id"),
-                                    "nexon_ocid": None,
-                                }
-                                return result
-                            elif e.response.status_code != 404:
-                                last_error = f"Status {e.response.status_code}: {e.response.text[:200] if hasattr(e.response, 'text') else 'unknown'}"
-                        except Exception as ex:
-                            # #region agent log
-                            try:
-                                with open("/app/debug.log", "a", encoding="utf-8") as f:
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run3","hypothesisId":"N","location":"maplestory_network_api.py:223","message":"Exception during API call","data":{"error_type":type(ex).__name__,"error_str":str(ex)},"timestamp":int(__import__("time").time()*1000)})+"\n")
-                            except Exception:
-                                pass
-                            # #endregion
-                            continue
-            
-            # If we get here, all endpoints returned 404 or errors
-            # Final attempt - check if we got any non-404 errors
-            if last_error:
-                raise MapleStoryNetworkAPIError(f"MapleStory Network API error: {last_error}")
-            else:
-                raise MapleStoryNetworkAPIError(f"Character '{character_name}' on {world} not found (tried all endpoint formats)")
+                    }
+                    graphql_response = await client.post(
+                        graphql_url,
+                        content=orjson.dumps(graphql_query),
+                        headers=headers,
+                        follow_redirects=True
+                    )
+                    if graphql_response.status_code == 200:
+                        graphql_data = orjson.loads(graphql_response.content)
+                        if "data" in graphql_data and graphql_data.get("data", {}).get("character"):
+                            char_data = graphql_data["data"]["character"]
+                            return _normalize_character_payload(char_data, character_name, world)
+                except Exception:
+                    pass
+
+        # Try different base URLs and endpoint formats. The probes are
+        # independent I/O, so fire them concurrently (bounded by a semaphore)
+        # and cancel the stragglers as soon as one succeeds. Different
+        # base_url/template combinations can resolve to the same request
+        # (e.g. ".../api" + "/characters" vs "..." + "/api/characters"), so
+        # each candidate is fingerprinted and duplicates are skipped.
+        candidates = []
+        seen: set = set()
+        for base_url in MAPLESTORY_NETWORK_API_BASE_OPTIONS:
+            for auth_method, req_headers, auth_params in self._auth_variants():
+                for endpoint_template, params in self._endpoint_formats(character_name, world):
+                    if "{name}" in endpoint_template:
+                        url = f"{base_url}{endpoint_template.format(name=character_name)}"
+                    else:
+                        url = f"{base_url}{endpoint_template}"
+                    fingerprint = (
+                        url,
+                        tuple(sorted({**params, **auth_params}.items())),
+                        auth_method,
+                    )
+                    if fingerprint in seen:
+                        continue
+                    seen.add(fingerprint)
+                    candidates.append(
+                        (base_url, endpoint_template, params, req_headers, auth_params, auth_method)
+                    )
+
+        sem = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+
+        async def probe(candidate):
+            base_url, endpoint_template, params, req_headers, auth_params, auth_method = candidate
+            async with sem:
+                return await self._probe_endpoint(
+                    client, base_url, endpoint_template, params, req_headers,
+                    auth_params, auth_method, character_name, world,
+                )
+
+        tasks = [asyncio.create_task(probe(candidate)) for candidate in candidates]
+        try:
+            for future in asyncio.as_completed(tasks):
+                result, error = await future
+                if error is not None:
+                    last_error = error
+                if result is not None:
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # If we get here, all endpoints returned 404 or errors
+        # Final attempt - check if we got any non-404 errors
+        if last_error:
+            raise MapleStoryNetworkAPIError(f"MapleStory Network API error: {last_error}")
+        else:
+            raise MapleStoryNetworkAPIError(f"Character '{character_name}' on {world} not found (tried all endpoint formats)")
+
+
+# Global client instance (shared so the connection pool is reused)
+_network_client: Optional[MapleStoryNetworkAPIClient] = None
 
 
 def get_maplestory_network_client() -> Optional[MapleStoryNetworkAPIClient]:
-    """Get MapleStory Network API client if token is configured."""
-    try:
-        return MapleStoryNetworkAPIClient()
-    except MapleStoryNetworkAPIError:
-        return None
+    """Get or create the global MapleStory Network API client if token is configured."""
+    global _network_client
+    if _network_client is None:
+        try:
+            _network_client = MapleStoryNetworkAPIClient()
+        except MapleStoryNetworkAPIError:
+            return None
+    return _network_client
+
 
+async def close_maplestory_network_client() -> None:
+    """Close the global client's pooled connections (called on app shutdown)."""
+    global _network_client
+    if _network_client is not None:
+        await _network_client.aclose()
+        _network_client = None
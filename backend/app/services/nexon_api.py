@@ -3,20 +3,98 @@ Nexon GMS Open API client for fetching character data.
 Handles OCID lookup, character basic info, and character image retrieval.
 """
 
+import asyncio
+import random
+import time
+from collections import OrderedDict
+
 import httpx
-from typing import Optional
+import orjson
+from typing import NoReturn, Optional
 
 from app.config import settings
+from app.redis import get_redis
 
 
 NEXON_API_BASE = "https://open.api.nexon.com"
 
+# OCIDs are permanent identifiers, so cache them for a day; basic info
+# (level, job, image) changes slowly, so a short TTL keeps it fresh while
+# still absorbing repeat lookups for the same character.
+OCID_TTL = 86400.0
+BASIC_TTL = 300.0
+CACHE_MAXSIZE = 10000
+
+# TTLs for the shared Redis tier. It survives worker restarts and is shared
+# across replicas, so all workers amortize the same upstream lookups.
+REDIS_OCID_TTL = 86400
+REDIS_BASIC_TTL = 300
+REDIS_IMAGE_TTL = 3600
+
+# Retry budget for 429 responses; each retry backs off exponentially with
+# jitter so a burst of callers doesn't re-synchronize on the API
+MAX_429_RETRIES = 3
+
+# The fields of /character/basic that callers actually consume; the rest of
+# the ~30-field payload is dropped right after parsing so caches and copies
+# only carry what's needed.
+_BASIC_FIELDS = (
+    "character_name",
+    "world_name",
+    "character_class",
+    "character_level",
+    "character_image",
+)
+
+# Common GMS world name -> Nexon world code mapping, built once at import.
+# Currently an identity map, but kept as a table in case codes diverge.
+_WORLD_MAP = {
+    "scania": "scania",
+    "bera": "bera",
+    "windia": "windia",
+    "khaini": "khaini",
+    "bellocan": "bellocan",
+    "mardia": "mardia",
+    "kradia": "kradia",
+    "yellonde": "yellonde",
+    "demethos": "demethos",
+    "galicia": "galicia",
+    "reboot": "reboot",
+    "reboot2": "reboot2",
+}
+
 
 class NexonAPIError(Exception):
     """Error when calling Nexon API."""
     pass
 
 
+class _TokenBucket:
+    """Minimal async token bucket used to pace outbound Nexon calls."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Sleeping while holding the lock is deliberate: it serializes
+        # waiters so requests drain at the configured rate
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1.0
+
+
 class NexonAPIClient:
     """
     Client for Nexon GMS Open API.
@@ -27,12 +105,121 @@ class NexonAPIClient:
         self.api_key = api_key or settings.nexon_api_key
         if not self.api_key:
             raise NexonAPIError("Nexon API key not configured. Set NEXON_API_KEY in environment.")
+        # One pooled client reused across calls; keep-alive connections avoid
+        # paying a fresh TCP+TLS handshake on every request.
+        # Headers only depend on the key, so build them once here
+        self._headers = {"x-nxopen-api-key": self.api_key}
+        self._client = httpx.AsyncClient(
+            base_url=NEXON_API_BASE,
+            headers=self._headers,
+            timeout=httpx.Timeout(10.0),
+            # A 60s keepalive expiry (vs the 5s default) keeps warm TLS
+            # sessions alive across the idle gaps between bursty lookups
+            limits=httpx.Limits(
+                max_connections=settings.nexon_max_connections,
+                max_keepalive_connections=50,
+                keepalive_expiry=60.0,
+            ),
+            # All calls hit open.api.nexon.com, so HTTP/2 lets concurrent
+            # requests multiplex over a single TLS connection
+            http2=True,
+        )
+        # LRU caches of (name, world) -> (expiry, ocid) and ocid -> (expiry, basic)
+        self._ocid_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._basic_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # In-flight requests by namespaced key; concurrent identical calls
+        # await the first caller's future instead of duplicating the request
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # Client-side throttle so bursts don't burn quota on 429 round trips
+        self._limiter = _TokenBucket(settings.nexon_rate_per_sec)
+
+    async def _get(self, path: str, params: dict) -> httpx.Response:
+        """Rate-limited GET that retries 429s with exponential backoff."""
+        for attempt in range(MAX_429_RETRIES + 1):
+            await self._limiter.acquire()
+            response = await self._client.get(path, params=params)
+            if response.status_code != 429 or attempt == MAX_429_RETRIES:
+                response.raise_for_status()
+                return response
+            await asyncio.sleep((2 ** attempt) * 0.5 + random.random() * 0.25)
+
+    async def _single_flight(self, key: tuple, fetch):
+        """Run fetch() once per key; concurrent callers share the result."""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await inflight
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited future doesn't warn on GC
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key):
+        """Return a fresh cached value or None, evicting it if expired."""
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() < expires_at:
+            cache.move_to_end(key)
+            return value
+        del cache[key]
+        return None
+
+    @staticmethod
+    def _cache_put(cache: OrderedDict, key, value, ttl: float) -> None:
+        """Store a value with a TTL, evicting the least recently used entry."""
+        cache[key] = (time.monotonic() + ttl, value)
+        cache.move_to_end(key)
+        if len(cache) > CACHE_MAXSIZE:
+            cache.popitem(last=False)
+
+    @staticmethod
+    async def _redis_get(key: str) -> Optional[str]:
+        """Best-effort read from the shared Redis tier; None when unavailable."""
+        try:
+            return await get_redis().get(key)
+        except Exception:
+            return None
+
+    @staticmethod
+    async def _redis_set(key: str, value, ttl: int) -> None:
+        """Best-effort write to the shared Redis tier."""
+        try:
+            await get_redis().setex(key, ttl, value)
+        except Exception:
+            pass
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        await self._client.aclose()
 
-    def _get_headers(self) -> dict:
-        """Get headers for API requests."""
-        return {
-            "x-nxopen-api-key": self.api_key,
-        }
+    async def __aenter__(self) -> "NexonAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _raise_from_status(self, e: httpx.HTTPStatusError, *, not_found_msg: str) -> NoReturn:
+        """Map an upstream status code to a NexonAPIError."""
+        status = e.response.status_code
+        if status == 400:
+            raise NexonAPIError(not_found_msg)
+        elif status == 401:
+            raise NexonAPIError("Invalid Nexon API key")
+        elif status == 429:
+            raise NexonAPIError("Nexon API rate limit exceeded")
+        else:
+            raise NexonAPIError(f"Nexon API error: {status}")
 
     async def get_character_ocid(self, character_name: str, world: str) -> str:
         """
@@ -51,37 +238,49 @@ class NexonAPIClient:
         if not self.api_key:
             raise NexonAPIError("Nexon API key not configured")
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                # Map world names to Nexon world codes if needed
-                # Common GMS worlds: Scania, Bera, Windia, Khaini, Bellocan, Mardia, Kradia, Yellonde, Demethos, Galicia, Reboot, Reboot2
-                world_code = self._normalize_world(world)
-                
-                response = await client.get(
-                    f"{NEXON_API_BASE}/maplestory/v1/id",
-                    params={
-                        "character_name": character_name,
-                    },
-                    headers=self._get_headers(),
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if "ocid" not in data:
-                    raise NexonAPIError(f"Character '{character_name}' not found")
-                
-                return data["ocid"]
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 400:
-                    raise NexonAPIError(f"Character '{character_name}' not found or invalid")
-                elif e.response.status_code == 401:
-                    raise NexonAPIError("Invalid Nexon API key")
-                elif e.response.status_code == 429:
-                    raise NexonAPIError("Nexon API rate limit exceeded")
-                else:
-                    raise NexonAPIError(f"Nexon API error: {e.response.status_code}")
-            except httpx.RequestError as e:
-                raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
+        cache_key = (character_name.lower(), world.lower())
+        cached = self._cache_get(self._ocid_cache, cache_key)
+        if cached is not None:
+            return cached
+
+        return await self._single_flight(
+            ("ocid",) + cache_key,
+            lambda: self._fetch_character_ocid(character_name, world, cache_key),
+        )
+
+    async def _fetch_character_ocid(
+        self, character_name: str, world: str, cache_key: tuple[str, str]
+    ) -> str:
+        redis_key = f"nexon:ocid:{cache_key[1]}:{cache_key[0]}"
+        cached = await self._redis_get(redis_key)
+        if cached is not None:
+            self._cache_put(self._ocid_cache, cache_key, cached, OCID_TTL)
+            return cached
+
+        try:
+            # Map world names to Nexon world codes if needed
+            # Common GMS worlds: Scania, Bera, Windia, Khaini, Bellocan, Mardia, Kradia, Yellonde, Demethos, Galicia, Reboot, Reboot2
+            world_code = self._normalize_world(world)
+
+            response = await self._get(
+                "/maplestory/v1/id",
+                params={"character_name": character_name},
+            )
+            data = orjson.loads(response.content)
+
+            if "ocid" not in data:
+                raise NexonAPIError(f"Character '{character_name}' not found")
+
+            ocid = data["ocid"]
+            self._cache_put(self._ocid_cache, cache_key, ocid, OCID_TTL)
+            await self._redis_set(redis_key, ocid, REDIS_OCID_TTL)
+            return ocid
+        except httpx.HTTPStatusError as e:
+            self._raise_from_status(
+                e, not_found_msg=f"Character '{character_name}' not found or invalid"
+            )
+        except httpx.RequestError as e:
+            raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
 
     async def get_character_basic(self, ocid: str) -> dict:
         """
@@ -105,26 +304,38 @@ class NexonAPIClient:
         if not self.api_key:
             raise NexonAPIError("Nexon API key not configured")
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{NEXON_API_BASE}/maplestory/v1/character/basic",
-                    params={"ocid": ocid},
-                    headers=self._get_headers(),
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 400:
-                    raise NexonAPIError(f"Invalid OCID: {ocid}")
-                elif e.response.status_code == 401:
-                    raise NexonAPIError("Invalid Nexon API key")
-                elif e.response.status_code == 429:
-                    raise NexonAPIError("Nexon API rate limit exceeded")
-                else:
-                    raise NexonAPIError(f"Nexon API error: {e.response.status_code}")
-            except httpx.RequestError as e:
-                raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
+        # Hand out copies so callers can annotate the dict without
+        # polluting the cached entry
+        cached = self._cache_get(self._basic_cache, ocid)
+        if cached is not None:
+            return dict(cached)
+
+        data = await self._single_flight(
+            ("basic", ocid), lambda: self._fetch_character_basic(ocid)
+        )
+        return dict(data)
+
+    async def _fetch_character_basic(self, ocid: str) -> dict:
+        redis_key = f"nexon:basic:{ocid}"
+        cached = await self._redis_get(redis_key)
+        if cached is not None:
+            data = orjson.loads(cached)
+            self._cache_put(self._basic_cache, ocid, data, BASIC_TTL)
+            return data
+
+        try:
+            response = await self._get(
+                "/maplestory/v1/character/basic", params={"ocid": ocid}
+            )
+            parsed = orjson.loads(response.content)
+            data = {field: parsed.get(field) for field in _BASIC_FIELDS}
+            self._cache_put(self._basic_cache, ocid, data, BASIC_TTL)
+            await self._redis_set(redis_key, orjson.dumps(data), REDIS_BASIC_TTL)
+            return data
+        except httpx.HTTPStatusError as e:
+            self._raise_from_status(e, not_found_msg=f"Invalid OCID: {ocid}")
+        except httpx.RequestError as e:
+            raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
 
     async def get_character_image(self, ocid: str) -> str:
         """
@@ -142,27 +353,29 @@ class NexonAPIClient:
         if not self.api_key:
             raise NexonAPIError("Nexon API key not configured")
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{NEXON_API_BASE}/maplestory/v1/character/character-image",
-                    params={"ocid": ocid},
-                    headers=self._get_headers(),
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("character_image", "")
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 400:
-                    raise NexonAPIError(f"Invalid OCID: {ocid}")
-                elif e.response.status_code == 401:
-                    raise NexonAPIError("Invalid Nexon API key")
-                elif e.response.status_code == 429:
-                    raise NexonAPIError("Nexon API rate limit exceeded")
-                else:
-                    raise NexonAPIError(f"Nexon API error: {e.response.status_code}")
-            except httpx.RequestError as e:
-                raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
+        return await self._single_flight(
+            ("image", ocid), lambda: self._fetch_character_image(ocid)
+        )
+
+    async def _fetch_character_image(self, ocid: str) -> str:
+        redis_key = f"nexon:img:{ocid}"
+        cached = await self._redis_get(redis_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self._get(
+                "/maplestory/v1/character/character-image", params={"ocid": ocid}
+            )
+            data = orjson.loads(response.content)
+            image_url = data.get("character_image", "")
+            if image_url:
+                await self._redis_set(redis_key, image_url, REDIS_IMAGE_TTL)
+            return image_url
+        except httpx.HTTPStatusError as e:
+            self._raise_from_status(e, not_found_msg=f"Invalid OCID: {ocid}")
+        except httpx.RequestError as e:
+            raise NexonAPIError(f"Failed to connect to Nexon API: {e}")
 
     async def lookup_character(self, character_name: str, world: str) -> dict:
         """
@@ -183,48 +396,72 @@ class NexonAPIClient:
         """
         # Get OCID
         ocid = await self.get_character_ocid(character_name, world)
-        
-        # Get basic info (includes image URL)
+
         basic_info = await self.get_character_basic(ocid)
-        
-        # Get image URL separately (more reliable)
-        try:
-            image_url = await self.get_character_image(ocid)
-            basic_info["character_image"] = image_url
-        except NexonAPIError:
-            # If image fetch fails, use the one from basic info if available
-            pass
-        
+
+        # Basic info usually already carries the image URL; only pay for the
+        # dedicated image endpoint when it's missing
+        if not basic_info.get("character_image"):
+            try:
+                basic_info["character_image"] = await self.get_character_image(ocid)
+            except NexonAPIError:
+                pass
+
         basic_info["ocid"] = ocid
         return basic_info
 
+    async def lookup_characters(
+        self, names: list[str], world: str, max_concurrency: int = 16
+    ) -> list[dict | Exception]:
+        """
+        Look up several characters on the same world concurrently.
+
+        Lookups run with bounded concurrency so a large roster doesn't blow
+        through the Nexon rate limit. Results come back in input order; a
+        failed lookup yields its exception in that slot instead of raising.
+
+        Args:
+            names: Character names
+            world: World/server name
+            max_concurrency: Maximum number of lookups in flight at once
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_lookup(name: str) -> dict:
+            async with semaphore:
+                return await self.lookup_character(name, world)
+
+        return await asyncio.gather(
+            *(bounded_lookup(name) for name in names), return_exceptions=True
+        )
+
     def _normalize_world(self, world: str) -> str:
         """
         Normalize world name to match Nexon API format.
         The API might expect specific world codes or names.
         """
-        # Common world name mappings
-        world_mapping = {
-            "scania": "scania",
-            "bera": "bera",
-            "windia": "windia",
-            "khaini": "khaini",
-            "bellocan": "bellocan",
-            "mardia": "mardia",
-            "kradia": "kradia",
-            "yellonde": "yellonde",
-            "demethos": "demethos",
-            "galicia": "galicia",
-            "reboot": "reboot",
-            "reboot2": "reboot2",
-        }
-        return world_mapping.get(world.lower(), world.lower())
+        return _WORLD_MAP.get(world.lower(), world.lower())
+
+
+# Global client instance (holds the connection pool and caches)
+_nexon_client: Optional[NexonAPIClient] = None
 
 
 def get_nexon_client() -> Optional[NexonAPIClient]:
-    """Get Nexon API client if API key is configured."""
-    try:
-        return NexonAPIClient()
-    except NexonAPIError:
-        return None
+    """Get or create the global Nexon API client, or None if no key is configured."""
+    global _nexon_client
+    if _nexon_client is None:
+        try:
+            _nexon_client = NexonAPIClient()
+        except NexonAPIError:
+            return None
+    return _nexon_client
+
+
+async def close_nexon_client() -> None:
+    """Close the global Nexon API client (called on app shutdown)."""
+    global _nexon_client
+    if _nexon_client is not None:
+        await _nexon_client.aclose()
+        _nexon_client = None
 
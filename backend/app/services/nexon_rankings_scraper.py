@@ -9,16 +9,161 @@ WARNING: This scraper should be used responsibly:
 - This is a fallback option when APIs are unavailable
 """
 
+import asyncio
+import functools
+import random
+import time
+from collections import OrderedDict, deque
+
 import httpx
 import json
+import logging
+import orjson
 import re
+from logging.handlers import RotatingFileHandler
+from types import MappingProxyType
 from typing import Optional, Dict
 from urllib.parse import quote
 import os
-from datetime import datetime
 
 from app.config import settings
 
+try:
+    # Optional RFC-9111 response cache; the scraper works without it
+    import hishel
+except ImportError:
+    hishel = None
+
+
+# Debug diagnostics go through the logging framework instead of synchronous
+# per-line makedirs/open/write calls, so the event loop is never blocked on
+# disk I/O. In debug mode a rotating handler keeps the old file destination.
+logger = logging.getLogger("nexon_scraper")
+if settings.debug and not logger.handlers:
+    try:
+        os.makedirs("/app/.cursor", exist_ok=True)
+        _handler = RotatingFileHandler(
+            "/app/.cursor/debug.log", maxBytes=1_000_000, backupCount=1
+        )
+        _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(_handler)
+        logger.setLevel(logging.DEBUG)
+    except OSError:
+        pass
+
+
+def _dbg(message: str, **data) -> None:
+    """Emit a debug line; skips payload formatting entirely when DEBUG is off."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s %s", message, data)
+
+
+# Rankings refresh on a weekly cadence, so successful lookups stay fresh for
+# an hour (jittered so a warm burst doesn't expire all at once); misses are
+# remembered briefly so repeated bad names stay cheap.
+LOOKUP_CACHE_TTL = 3600.0
+LOOKUP_NEGATIVE_TTL = 60.0
+LOOKUP_CACHE_MAXSIZE = 4096
+
+# Cap on concurrent fallback-endpoint probes so a cold miss doesn't open
+# 20 sockets at once against nexon.com. Each probe gets a short per-request
+# timeout and the whole burst runs under a hard wall-clock budget: hitting
+# the HTML fallback beats hanging on slow dead endpoints.
+PROBE_CONCURRENCY = 4
+PROBE_REQUEST_TIMEOUT = 3.0
+PROBE_TOTAL_TIMEOUT = 10.0
+
+# Literal anchors for embedded state blobs. raw_decode from the opening
+# brace stops exactly at the end of the object, so the fast path is one
+# linear pass instead of a backtracking regex scan over multi-MB HTML.
+_JSON_DECODER = json.JSONDecoder()
+_JSON_ANCHORS = (
+    "window.__INITIAL_STATE__",
+    "window.__NEXT_DATA__",
+    '<script id="__NEXT_DATA__"',
+)
+
+# Patterns for JSON data embedded in the rankings page (many React apps do
+# this); compiled once at import instead of on every HTML parse.
+_JSON_PATTERNS = (
+    re.compile(r'window\.__INITIAL_STATE__\s*=\s*({.+?});', re.DOTALL),
+    re.compile(r'window\.__NEXT_DATA__\s*=\s*({.+?});', re.DOTALL),
+    re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>({.+?})</script>', re.DOTALL),
+    re.compile(r'"characterData"\s*:\s*({.+?})', re.DOTALL),
+)
+
+
+@functools.lru_cache(maxsize=512)
+def _level_re(character_name: str) -> re.Pattern:
+    """Per-name level pattern for the direct-HTML fallback."""
+    return re.compile(
+        rf'{re.escape(character_name)}.*?Level[:\s]+(\d+)', re.IGNORECASE
+    )
+
+
+@functools.lru_cache(maxsize=512)
+def _job_re(character_name: str) -> re.Pattern:
+    """Per-name job/class pattern for the direct-HTML fallback."""
+    return re.compile(
+        rf'{re.escape(character_name)}.*?(?:Job|Class)[:\s]+([A-Za-z\s]+)',
+        re.IGNORECASE,
+    )
+
+
+# Shared HTTP client. Scrapers are constructed per request, so the pool has
+# to live at module scope for keep-alive connections to be reused at all.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get or create the shared pooled HTTP client.
+
+    When hishel is installed the client honours the rankings API's cache
+    headers (ETag/Cache-Control), so unchanged responses skip the body
+    transfer and JSON parse entirely.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        client_kwargs = dict(
+            http2=True,
+            timeout=15.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            headers={
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                "Accept": "application/json, text/plain, */*",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Referer": "https://www.nexon.com/maplestory/",
+            },
+        )
+        if hishel is not None:
+            _client = hishel.AsyncCacheClient(
+                storage=hishel.AsyncFileStorage(base_path=".cache/nexon", ttl=1800),
+                controller=hishel.Controller(
+                    cacheable_methods=["GET"],
+                    cacheable_status_codes=[200, 404],
+                    allow_stale=False,
+                ),
+                **client_kwargs,
+            )
+        else:
+            _client = httpx.AsyncClient(**client_kwargs)
+    return _client
+
+
+# (endpoint, param-keys) combos that 404ed or refused connections; module
+# scope so probe memory outlives any one scraper instance. Bounded by the
+# candidate matrix, so no eviction needed.
+_known_404: set = set()
+
+
+async def close_nexon_rankings_client() -> None:
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class NexonRankingsScraperError(Exception):
     """Error when scraping Nexon rankings."""
@@ -31,33 +176,27 @@ class NexonRankingsScraper:
     Attempts to find and use API endpoints first, falls back to HTML parsing.
     """
 
+    # Reboot worlds: Kronos, Hyperion (NA), Solis (EU)
+    _REBOOT_WORLDS = frozenset({"kronos", "hyperion", "solis"})
+
+    # World to region mapping
+    # NA (North America): Scania, Bera (regular), Kronos, Hyperion (reboot)
+    # EU (Europe): Luna (regular), Solis (reboot)
+    _WORLD_TO_REGION = MappingProxyType({
+        # North America (GMS)
+        "scania": "na",
+        "bera": "na",
+        "kronos": "na",
+        "hyperion": "na",
+        # Europe (EMS)
+        "solis": "eu",
+        "luna": "eu",
+    })
+
     def __init__(self):
         self.base_url = "https://www.nexon.com"
         self.rankings_url = f"{self.base_url}/maplestory/rankings"
-        self.client = httpx.AsyncClient(
-            timeout=15.0,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Referer": f"{self.base_url}/maplestory/",
-            }
-        )
-        
-        # World to region mapping
-        # NA (North America): Scania, Bera (regular), Kronos, Hyperion (reboot)
-        # EU (Europe): Luna (regular), Solis (reboot)
-        self.world_to_region = {
-            # North America (GMS)
-            "scania": "na",
-            "bera": "na",
-            "kronos": "na",
-            "hyperion": "na",
-            # Europe (EMS)
-            "solis": "eu",
-            "luna": "eu",
-        }
+        self.client = _get_client()
         
         # WorldID to world name mapping
         # These IDs are used by the Nexon rankings API
@@ -74,17 +213,20 @@ class NexonRankingsScraper:
             46: "Solis",  # Reboot EU
         }
 
+        # LRU of (name, world) -> (expiry, result); result None == cached miss
+        self._lookup_cache: OrderedDict[
+            tuple[str, str], tuple[float, Optional[Dict]]
+        ] = OrderedDict()
+        # Per-key locks so concurrent misses for the same character coalesce
+        self._lookup_locks: Dict[tuple[str, str], asyncio.Lock] = {}
+
     def _is_reboot_world(self, world: str) -> bool:
         """Check if world is a Reboot world."""
-        world_lower = world.lower()
-        # Reboot worlds: Kronos, Hyperion (NA), Solis (EU)
-        reboot_worlds = {"kronos", "hyperion", "solis"}
-        return world_lower in reboot_worlds
-    
+        return world.casefold() in self._REBOOT_WORLDS
+
     def _get_region_from_world(self, world: str) -> str:
         """Get region code (na, eu) from world name."""
-        world_lower = world.lower()
-        return self.world_to_region.get(world_lower, "na")  # Default to NA
+        return self._WORLD_TO_REGION.get(world.casefold(), "na")  # Default to NA
     
     async def _try_public_rankings_api(self, character_name: str, world: str) -> Optional[Dict]:
         """
@@ -93,26 +235,15 @@ class NexonRankingsScraper:
         - Regular servers: /api/maplestory/no-auth/ranking/v2/{region}?type=overall&id=weekly&regular_index=1&page_index=1&character_name={name}
         - Reboot servers: /api/maplestory/no-auth/ranking/v2/{region}?type=overall&id=weekly&reboot_index=1&page_index=1&character_name={name}
         """
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:entry","message":"API lookup started","data":{"character_name":character_name,"world":world},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("rankings API lookup started", character_name=character_name, world=world)
         
-        region = self._get_region_from_world(world)
-        is_reboot = self._is_reboot_world(world)
+        # Fold the inputs once; everything downstream compares against these
+        world_cf = world.casefold()
+        needle = character_name.casefold()
+        region = self._WORLD_TO_REGION.get(world_cf, "na")
+        is_reboot = world_cf in self._REBOOT_WORLDS
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"E","location":"nexon_rankings_scraper.py:_try_public_rankings_api:params","message":"Region and reboot detection","data":{"region":region,"is_reboot":is_reboot,"world_lower":world.lower()},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("region and reboot detection", region=region, is_reboot=is_reboot)
         
         # Try both regular and reboot for the character (prefer the detected type first)
         attempts = []
@@ -123,122 +254,101 @@ class NexonRankingsScraper:
             attempts.append({"regular_index": 1})
             attempts.append({"reboot_index": 1})  # Fallback to reboot
         
-        for params_variant in attempts:
-            try:
-                endpoint = f"{self.base_url}/api/maplestory/no-auth/ranking/v2/{region}"
-                params = {
-                    "type": "overall",
-                    "id": "weekly",
-                    "page_index": 1,
-                    "character_name": character_name,
-                    **params_variant,  # Add either regular_index=1 or reboot_index=1
-                }
-                
-                # #region agent log
-                log_path = "/app/.cursor/debug.log"
-                try:
-                    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                    with open(log_path, "a", encoding="utf-8") as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:request","message":"Making API request","data":{"endpoint":endpoint,"params":params},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                except: pass
-                # #endregion
-                
-                response = await self.client.get(endpoint, params=params)
-                
-                # #region agent log
-                log_path = "/app/.cursor/debug.log"
-                try:
-                    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                    with open(log_path, "a", encoding="utf-8") as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:response","message":"API response received","data":{"status_code":response.status_code,"has_content":bool(response.content)},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                except: pass
-                # #endregion
-                
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        
-                        # #region agent log
-                        log_path = "/app/.cursor/debug.log"
-                        try:
-                            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                            with open(log_path, "a", encoding="utf-8") as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"nexon_rankings_scraper.py:_try_public_rankings_api:parsed","message":"Response parsed","data":{"is_dict":isinstance(data,dict),"has_ranks":"ranks" in data if isinstance(data,dict) else False,"totalCount":data.get("totalCount") if isinstance(data,dict) else None},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                        except: pass
-                        # #endregion
-                        
-                        # Check if response has the expected format with ranks array
-                        if isinstance(data, dict) and "ranks" in data:
-                            ranks = data.get("ranks", [])
-                            
-                            # #region agent log
-                            log_path = "/app/.cursor/debug.log"
-                            try:
-                                os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                                with open(log_path, "a", encoding="utf-8") as f:
-                                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"nexon_rankings_scraper.py:_try_public_rankings_api:ranks","message":"Ranks array check","data":{"ranks_count":len(ranks),"ranks_sample":[{"name":r.get("characterName"),"worldID":r.get("worldID")} for r in ranks[:3]] if ranks else []},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                            except: pass
-                            # #endregion
-                            
-                            if ranks:
-                                # Find the character in the ranks (should match character_name)
-                                for rank_entry in ranks:
-                                    rank_name = rank_entry.get("characterName", "").lower()
-                                    
-                                    # #region agent log
-                                    log_path = "/app/.cursor/debug.log"
-                                    try:
-                                        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                                        with open(log_path, "a", encoding="utf-8") as f:
-                                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"C","location":"nexon_rankings_scraper.py:_try_public_rankings_api:match","message":"Checking character name match","data":{"rank_name":rank_name,"search_name":character_name.lower(),"matches":rank_name==character_name.lower()},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                                    except: pass
-                                    # #endregion
-                                    
-                                    if rank_name == character_name.lower():
-                                        result = self._parse_rankings_api_response(rank_entry, world)
-                                        
-                                        # #region agent log
-                                        log_path = "/app/.cursor/debug.log"
-                                        try:
-                                            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                                            with open(log_path, "a", encoding="utf-8") as f:
-                                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:success","message":"Character found and parsed","data":{"result_world":result.get("world"),"result_level":result.get("level")},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                                        except: pass
-                                        # #endregion
-                                        
-                                        return result
-                    except json.JSONDecodeError as e:
-                        # #region agent log
-                        log_path = "/app/.cursor/debug.log"
-                        try:
-                            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                            with open(log_path, "a", encoding="utf-8") as f:
-                                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"B","location":"nexon_rankings_scraper.py:_try_public_rankings_api:json_error","message":"JSON decode error","data":{"error":str(e)},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                        except: pass
-                        # #endregion
-                        continue
-            except Exception as e:
-                # #region agent log
-                log_path = "/app/.cursor/debug.log"
+        # Fire both index variants concurrently so the wrong-guess case
+        # doesn't pay two sequential round trips. The detected type always
+        # gets the final say: a fallback match is only returned once the
+        # preferred variant has finished without one, so same-named
+        # characters on the other server type can't win the race.
+        tasks = [
+            asyncio.create_task(
+                self._do_one_attempt(region, character_name, needle, world, variant)
+            )
+            for variant in attempts
+        ]
+        preferred = tasks[0]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                candidate = await finished
+                if not candidate:
+                    continue
                 try:
-                    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                    with open(log_path, "a", encoding="utf-8") as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:exception","message":"Exception during API call","data":{"error":str(e),"error_type":type(e).__name__},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-                except: pass
-                # #endregion
-                continue
+                    preferred_result = await preferred
+                except Exception:
+                    preferred_result = None
+                return preferred_result or candidate
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        _dbg("no character found in rankings API")
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
+        return None
+
+    async def _do_one_attempt(
+        self,
+        region: str,
+        character_name: str,
+        needle: str,
+        world: str,
+        params_variant: Dict,
+    ) -> Optional[Dict]:
+        """Run one regular/reboot-index request and return the parsed match, if any."""
         try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:_try_public_rankings_api:exit","message":"No character found in API","data":{},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
-        
+            endpoint = f"{self.base_url}/api/maplestory/no-auth/ranking/v2/{region}"
+            params = {
+                "type": "overall",
+                "id": "weekly",
+                "page_index": 1,
+                "character_name": character_name,
+                **params_variant,  # Add either regular_index=1 or reboot_index=1
+            }
+
+            _dbg("making rankings API request", endpoint=endpoint, params=params)
+
+            response = await self.client.get(endpoint, params=params)
+
+            _dbg("rankings API response", status_code=response.status_code, has_content=bool(response.content))
+
+            if response.status_code != 200:
+                return None
+            try:
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError,
+                # so existing handlers keep working
+                data = orjson.loads(response.content)
+            except json.JSONDecodeError as e:
+                _dbg("rankings JSON decode error", error=str(e))
+                return None
+
+            _dbg("rankings response parsed", has_ranks=isinstance(data, dict) and "ranks" in data)
+
+            # Check if response has the expected format with ranks array
+            if isinstance(data, dict) and "ranks" in data:
+                ranks = data.get("ranks", [])
+
+                _dbg("ranks array check", ranks_count=len(ranks))
+
+                if ranks:
+                    # Find the character in the ranks (should match character_name)
+                    match = next(
+                        (
+                            entry
+                            for entry in ranks
+                            if (entry.get("characterName") or "").casefold() == needle
+                        ),
+                        None,
+                    )
+                    if match:
+                        result = self._parse_rankings_api_response(match, world)
+
+                        _dbg("character found in rankings", world=result.get("world"), level=result.get("level"))
+
+                        return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _dbg("rankings API request failed", error_type=type(e).__name__, error=str(e))
         return None
-    
+
     async def _try_api_endpoint(self, character_name: str, world: str) -> Optional[Dict]:
         """
         Try to find and use the API endpoint that the rankings page uses.
@@ -265,21 +375,53 @@ class NexonRankingsScraper:
             {"characterName": character_name, "worldName": world},
         ]
         
-        for endpoint in api_endpoints:
-            for params in params_variants:
+        # Probe the candidate matrix concurrently (bounded) and skip combos
+        # already known to be dead
+        candidates = [
+            (endpoint, params)
+            for endpoint in api_endpoints
+            for params in params_variants
+            if (endpoint, tuple(sorted(params))) not in _known_404
+        ]
+        if not candidates:
+            return None
+
+        semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+        async def probe(endpoint: str, params: Dict) -> Optional[Dict]:
+            fingerprint = (endpoint, tuple(sorted(params)))
+            async with semaphore:
                 try:
-                    response = await self.client.get(endpoint, params=params)
+                    response = await self.client.get(
+                        endpoint, params=params, timeout=PROBE_REQUEST_TIMEOUT
+                    )
                     if response.status_code == 200:
                         try:
-                            data = response.json()
+                            data = orjson.loads(response.content)
                             # Check if response looks like character data
                             if isinstance(data, dict) and any(key in data for key in ["characterName", "name", "level", "job"]):
                                 return self._parse_api_response(data, character_name, world)
                         except json.JSONDecodeError:
-                            continue
+                            return None
+                    elif response.status_code == 404:
+                        _known_404.add(fingerprint)
+                except httpx.ConnectError:
+                    _known_404.add(fingerprint)
                 except Exception:
-                    continue
-        
+                    pass
+                return None
+
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(probe(ep, p) for ep, p in candidates)),
+                timeout=PROBE_TOTAL_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            _dbg("fallback probe burst timed out", budget=PROBE_TOTAL_TIMEOUT)
+            return None
+        for result in results:
+            if result:
+                return result
         return None
 
     async def _fetch_rankings_page(self, character_name: str, world: str) -> str:
@@ -309,19 +451,29 @@ class NexonRankingsScraper:
         Parse HTML response to extract character data.
         This is a fallback when API endpoints aren't available.
         """
-        # Try to find JSON data embedded in the page (many React apps do this)
-        json_patterns = [
-            r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
-            r'window\.__NEXT_DATA__\s*=\s*({.+?});',
-            r'<script[^>]*id="__NEXT_DATA__"[^>]*>({.+?})</script>',
-            r'"characterData"\s*:\s*({.+?})',
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, html, re.DOTALL)
+        # Fast path: locate the state blob by literal anchor and decode it
+        # in place
+        for anchor in _JSON_ANCHORS:
+            start = html.find(anchor)
+            if start < 0:
+                continue
+            brace = html.find("{", start)
+            if brace < 0:
+                continue
+            try:
+                data, _ = _JSON_DECODER.raw_decode(html, brace)
+            except json.JSONDecodeError:
+                continue
+            parsed = self._extract_character_from_json(data, character_name, world)
+            if parsed:
+                return parsed
+
+        # Fallback: regex scan for embedded-JSON shapes without an anchor
+        for pattern in _JSON_PATTERNS:
+            matches = pattern.findall(html)
             for match in matches:
                 try:
-                    data = json.loads(match)
+                    data = orjson.loads(match)
                     parsed = self._extract_character_from_json(data, character_name, world)
                     if parsed:
                         return parsed
@@ -330,8 +482,8 @@ class NexonRankingsScraper:
         
         # Fallback: Try to parse HTML directly (more fragile)
         # Look for character name, level, job in the HTML
-        level_match = re.search(rf'{re.escape(character_name)}.*?Level[:\s]+(\d+)', html, re.IGNORECASE)
-        job_match = re.search(rf'{re.escape(character_name)}.*?(?:Job|Class)[:\s]+([A-Za-z\s]+)', html, re.IGNORECASE)
+        level_match = _level_re(character_name).search(html)
+        job_match = _job_re(character_name).search(html)
         
         result = {
             "character_name": character_name,
@@ -354,56 +506,52 @@ class NexonRankingsScraper:
 
     def _extract_character_from_json(self, data: Dict, character_name: str, world: str) -> Optional[Dict]:
         """
-        Recursively search JSON data for character information.
+        Search embedded JSON data for character information.
+
+        Iterative depth-first walk: Next.js state blobs nest deeply enough
+        that per-node recursion frames are measurable, and the name check is
+        done first so non-matching nodes are rejected cheaply.
         """
-        def find_character(obj, path=""):
+        target_name = character_name.casefold()
+        target_world = world.casefold()
+        stack = deque([data])
+        while stack:
+            obj = stack.pop()
             if isinstance(obj, dict):
                 # Check if this looks like character data
                 name = obj.get("characterName") or obj.get("name") or obj.get("character_name")
-                if name and name.lower() == character_name.lower():
+                if name and name.casefold() == target_name:
                     world_name = obj.get("world") or obj.get("worldName") or obj.get("world_name")
-                    if world_name and world_name.lower() == world.lower():
+                    if world_name and world_name.casefold() == target_world:
+                        level = obj.get("level") or obj.get("characterLevel") or obj.get("character_level")
+                        job = obj.get("job") or obj.get("characterClass") or obj.get("character_class") or obj.get("class")
+                        image = obj.get("characterImage") or obj.get("image") or obj.get("imageUrl")
+                        ocid = obj.get("ocid") or obj.get("id")
                         return {
                             "character_name": name,
                             "world": world_name,
                             "world_name": world_name,
-                            "level": obj.get("level") or obj.get("characterLevel") or obj.get("character_level"),
-                            "character_level": obj.get("level") or obj.get("characterLevel") or obj.get("character_level"),
-                            "job": obj.get("job") or obj.get("characterClass") or obj.get("character_class") or obj.get("class"),
-                            "character_class": obj.get("job") or obj.get("characterClass") or obj.get("character_class") or obj.get("class"),
-                            "character_image": obj.get("characterImage") or obj.get("image") or obj.get("imageUrl"),
-                            "character_icon_url": obj.get("characterImage") or obj.get("image") or obj.get("imageUrl"),
-                            "ocid": obj.get("ocid") or obj.get("id"),
-                            "nexon_ocid": obj.get("ocid") or obj.get("id"),
+                            "level": level,
+                            "character_level": level,
+                            "job": job,
+                            "character_class": job,
+                            "character_image": image,
+                            "character_icon_url": image,
+                            "ocid": ocid,
+                            "nexon_ocid": ocid,
                             # Total experience when present
                             "exp": obj.get("exp") or obj.get("experience") or obj.get("totalExp"),
                         }
-                # Recursively search nested objects
-                for key, value in obj.items():
-                    result = find_character(value, f"{path}.{key}")
-                    if result:
-                        return result
+                stack.extend(v for v in obj.values() if isinstance(v, (dict, list)))
             elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    result = find_character(item, f"{path}[{i}]")
-                    if result:
-                        return result
-            return None
-        
-        return find_character(data)
+                stack.extend(v for v in obj if isinstance(v, (dict, list)))
+        return None
 
     def _get_world_name_from_id(self, world_id: int) -> Optional[str]:
         """Get world name from worldID."""
         result = self.world_id_to_name.get(world_id)
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"nexon_rankings_scraper.py:_get_world_name_from_id","message":"WorldID mapping lookup","data":{"world_id":world_id,"mapped_name":result,"available_ids":list(self.world_id_to_name.keys())},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("worldID mapping lookup", world_id=world_id, mapped_name=result)
         
         return result
     
@@ -412,14 +560,7 @@ class NexonRankingsScraper:
         Parse the public rankings API response format.
         Format: {"characterName": "...", "level": 285, "jobName": "Zero", "characterImgURL": "...", "worldID": 46, ...}
         """
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"nexon_rankings_scraper.py:_parse_rankings_api_response:entry","message":"Parsing API response","data":{"rank_entry_keys":list(rank_entry.keys()),"worldID":rank_entry.get("worldID"),"characterName":rank_entry.get("characterName")},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("parsing rankings entry", character_name=rank_entry.get("characterName"), world_id=rank_entry.get("worldID"))
         
         character_id = rank_entry.get("characterID")
         # characterID of 0 means it's not available/valid
@@ -429,14 +570,7 @@ class NexonRankingsScraper:
         world_id = rank_entry.get("worldID")
         actual_world = self._get_world_name_from_id(world_id) if world_id is not None else world
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"nexon_rankings_scraper.py:_parse_rankings_api_response:mapped","message":"World mapped from worldID","data":{"world_id":world_id,"actual_world":actual_world,"fallback_world":world},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("world mapped from worldID", world_id=world_id, actual_world=actual_world)
         
         result = {
             "character_name": rank_entry.get("characterName") or "",
@@ -449,14 +583,7 @@ class NexonRankingsScraper:
             "exp": rank_entry.get("exp"),  # Total XP from rankings API
         }
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"D","location":"nexon_rankings_scraper.py:_parse_rankings_api_response:exit","message":"Parsed result","data":{"result_world":result.get("world"),"result_level":result.get("level"),"result_job":result.get("job")},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("parsed rankings entry", world=result.get("world"), level=result.get("level"), job=result.get("job"))
         
         return result
     
@@ -464,18 +591,25 @@ class NexonRankingsScraper:
         """
         Parse API response into our standard format.
         """
+        # Coalesce each aliased field once instead of repeating the chain
+        # for every key that emits it
+        world_name = data.get("world") or data.get("worldName") or world
+        level = data.get("level") or data.get("characterLevel") or data.get("character_level")
+        job = data.get("job") or data.get("characterClass") or data.get("character_class") or data.get("class")
+        image = data.get("characterImage") or data.get("image") or data.get("imageUrl")
+        ocid = data.get("ocid") or data.get("id")
         return {
             "character_name": data.get("characterName") or data.get("name") or character_name,
-            "world": data.get("world") or data.get("worldName") or world,
-            "world_name": data.get("world") or data.get("worldName") or world,
-            "level": data.get("level") or data.get("characterLevel") or data.get("character_level"),
-            "character_level": data.get("level") or data.get("characterLevel") or data.get("character_level"),
-            "job": data.get("job") or data.get("characterClass") or data.get("character_class") or data.get("class"),
-            "character_class": data.get("job") or data.get("characterClass") or data.get("character_class") or data.get("class"),
-            "character_image": data.get("characterImage") or data.get("image") or data.get("imageUrl"),
-            "character_icon_url": data.get("characterImage") or data.get("image") or data.get("imageUrl"),
-            "ocid": data.get("ocid") or data.get("id"),
-            "nexon_ocid": data.get("ocid") or data.get("id"),
+            "world": world_name,
+            "world_name": world_name,
+            "level": level,
+            "character_level": level,
+            "job": job,
+            "character_class": job,
+            "character_image": image,
+            "character_icon_url": image,
+            "ocid": ocid,
+            "nexon_ocid": ocid,
             # Total experience when provided by the rankings API/schema
             "exp": data.get("exp") or data.get("experience") or data.get("totalExp"),
         }
@@ -494,51 +628,87 @@ class NexonRankingsScraper:
         Raises:
             NexonRankingsScraperError: If lookup fails
         """
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
+        _dbg("lookup_character entry", character_name=character_name, world=world)
+
+        key = (character_name.casefold(), world.casefold())
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        lock = self._lookup_locks.setdefault(key, asyncio.Lock())
         try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:lookup_character:entry","message":"Character lookup started","data":{"character_name":character_name,"world":world},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
-        
+            async with lock:
+                # Another waiter may have populated the cache while we queued
+                cached = self._cache_get(key)
+                if cached is not None:
+                    return cached
+                try:
+                    result = await self._lookup_uncached(character_name, world)
+                except NexonRankingsScraperError:
+                    self._cache_put(key, None, LOOKUP_NEGATIVE_TTL)
+                    raise
+                # Jitter the TTL so entries warmed together don't expire together
+                ttl = LOOKUP_CACHE_TTL + random.uniform(0, LOOKUP_CACHE_TTL * 0.1)
+                self._cache_put(key, result, ttl)
+                return result
+        finally:
+            if not lock.locked():
+                self._lookup_locks.pop(key, None)
+
+    def _cache_get(self, key: tuple[str, str]) -> Optional[Dict]:
+        """Return a fresh cached result, raising for a cached miss."""
+        entry = self._lookup_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._lookup_cache[key]
+            return None
+        self._lookup_cache.move_to_end(key)
+        if value is None:
+            raise NexonRankingsScraperError(
+                f"Character '{key[0]}' on {key[1]} not found (cached)"
+            )
+        return value
+
+    def _cache_put(self, key: tuple[str, str], value: Optional[Dict], ttl: float) -> None:
+        """Store a lookup result with a TTL, evicting the least recently used."""
+        self._lookup_cache[key] = (time.monotonic() + ttl, value)
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > LOOKUP_CACHE_MAXSIZE:
+            self._lookup_cache.popitem(last=False)
+
+    async def _lookup_uncached(self, character_name: str, world: str) -> Dict:
+        """Run the actual rankings lookup (API first, HTML fallback)."""
         # First, try to find and use API endpoints (preferred method)
         api_result = await self._try_api_endpoint(character_name, world)
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:lookup_character:api_result","message":"API endpoint result","data":{"has_result":api_result is not None,"result_keys":list(api_result.keys()) if api_result else []},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("API endpoint result", has_result=api_result is not None)
         
         if api_result:
             return api_result
         
-        # #region agent log
-        log_path = "/app/.cursor/debug.log"
-        try:
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"nexon_rankings_scraper.py:lookup_character:fallback","message":"Falling back to HTML scraping","data":{},"timestamp":int(datetime.now().timestamp()*1000)})+"\n")
-        except: pass
-        # #endregion
+        _dbg("falling back to HTML scraping")
         
         # Fallback to HTML scraping
         html = await self._fetch_rankings_page(character_name, world)
         return self._parse_html_response(html, character_name, world)
 
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """No-op: the HTTP client is shared module-wide and closed on shutdown."""
+
+
+# Shared instance so the lookup cache, per-key locks, and probe memory
+# survive across requests (same pattern as get_nexon_client)
+_scraper: Optional[NexonRankingsScraper] = None
 
 
 def get_nexon_rankings_scraper() -> Optional[NexonRankingsScraper]:
-    """Get Nexon rankings scraper instance."""
-    try:
-        return NexonRankingsScraper()
-    except Exception:
-        return None
+    """Get the shared Nexon rankings scraper instance."""
+    global _scraper
+    if _scraper is None:
+        try:
+            _scraper = NexonRankingsScraper()
+        except Exception:
+            return None
+    return _scraper
@@ -3,15 +3,150 @@ Rate limiting service for GMSTracker.
 Uses Redis sliding window algorithm.
 """
 
-from datetime import datetime
+import asyncio
+import random
+import time
 from functools import wraps
 from typing import Callable
 
 from fastapi import HTTPException, Request, status
+from redis.exceptions import NoScriptError
 
 from app.redis import get_redis, RedisKeys
 
 
+# Sliding-window check as a single atomic script: trim, count, and either
+# reject (returning the oldest score for Retry-After) or record the request.
+# One round trip instead of a 4-command pipeline plus a follow-up ZRANGE.
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local member = ARGV[4]
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+if count >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return {0, count, oldest[2]}
+end
+redis.call('ZADD', key, now, member)
+redis.call('PEXPIRE', key, math.floor(window * 1000))
+return {1, count + 1, '0'}
+"""
+
+_sliding_window_sha: str | None = None
+
+
+async def _load_sliding_window_script(redis) -> str:
+    global _sliding_window_sha
+    if _sliding_window_sha is None:
+        _sliding_window_sha = await redis.script_load(_SLIDING_WINDOW_LUA)
+    return _sliding_window_sha
+
+
+class _PendingBatch:
+    """
+    Coalesces concurrent sliding-window script calls into one pipeline.
+
+    N requests arriving within the flush window pay a single Redis round
+    trip instead of N. Each caller appends (key, args, future) and awaits
+    its future; a short-lived task flushes the batch after ~1ms or as soon
+    as it reaches ``MAX_ITEMS``.
+    """
+
+    MAX_ITEMS = 32
+    FLUSH_AFTER = 0.001  # seconds
+
+    def __init__(self):
+        self._items: list[tuple[str, tuple, asyncio.Future]] = []
+        # Strong reference to the pending flush task; the event loop only
+        # keeps weak refs, so without this the task could be collected
+        # mid-sleep and strand every queued future
+        self._flusher: asyncio.Task | None = None
+
+    async def run(self, key: str, args: tuple):
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._items.append((key, args, future))
+        if len(self._items) >= self.MAX_ITEMS:
+            items, self._items = self._items, []
+            await self._flush(items)
+        elif self._flusher is None:
+            self._flusher = loop.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.FLUSH_AFTER)
+        self._flusher = None
+        items, self._items = self._items, []
+        await self._flush(items)
+
+    async def _flush(self, items):
+        if not items:
+            return
+        try:
+            redis = get_redis()
+            sha = await _load_sliding_window_script(redis)
+            pipe = redis.pipeline(transaction=False)
+            for key, args, _future in items:
+                pipe.evalsha(sha, 1, key, *args)
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            for _key, _args, future in items:
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+
+        retry = []
+        for (key, args, future), result in zip(items, results):
+            if isinstance(result, NoScriptError):
+                retry.append((key, args, future))
+            elif isinstance(result, Exception):
+                if not future.done():
+                    future.set_exception(result)
+                    future.exception()
+            elif not future.done():
+                future.set_result(result)
+
+        if retry:
+            # Script cache flushed (e.g. Redis restart); reload and re-run
+            global _sliding_window_sha
+            _sliding_window_sha = None
+            await self._flush(retry)
+
+
+_batch = _PendingBatch()
+
+# Whether the redis-cell module is loaded; probed once on first check.
+# With it, a strict check is one native CL.THROTTLE command and no zset.
+_redis_cell_available: bool | None = None
+
+
+async def _has_redis_cell(redis) -> bool:
+    global _redis_cell_available
+    if _redis_cell_available is None:
+        try:
+            modules = await redis.module_list()
+            _redis_cell_available = any(
+                module.get("name") == "redis-cell" for module in modules
+            )
+        except Exception:
+            # MODULE LIST can be disabled (managed Redis); assume absent
+            _redis_cell_available = False
+    return _redis_cell_available
+
+
+async def _run_sliding_window(key: str, now: float, window: int, limit: int):
+    """Run the sliding-window script for one request via the shared batch."""
+    # Unique member so concurrent requests in the same millisecond don't
+    # collapse into a single zset entry
+    member = f"{now}:{random.getrandbits(32):08x}"
+    return await _batch.run(key, (now, window, limit, member))
+
+
 class RateLimitExceeded(HTTPException):
     """Exception raised when rate limit is exceeded."""
 
@@ -57,34 +192,28 @@ class RateLimiter:
         Raises:
             RateLimitExceeded if limit exceeded
         """
-        redis = get_redis()
         key = RedisKeys.rate_limit(identifier, endpoint)
-        now = datetime.utcnow().timestamp()
-        window_start = now - self.window
-
-        # Use Redis pipeline for atomic operations
-        pipe = redis.pipeline()
-
-        # Remove old entries outside window
-        pipe.zremrangebyscore(key, 0, window_start)
-
-        # Count requests in current window
-        pipe.zcard(key)
-
-        # Add current request with timestamp as score
-        pipe.zadd(key, {str(now): now})
+        now = time.time()
 
-        # Set expiry on key
-        pipe.expire(key, self.window)
-
-        results = await pipe.execute()
-        request_count = results[1]
+        redis = get_redis()
+        if await _has_redis_cell(redis):
+            # [limited, total, remaining, retry_after, reset_after]
+            result = await redis.execute_command(
+                "CL.THROTTLE", key, self.requests - 1, self.requests, self.window, 1
+            )
+            if result[0] == 1:
+                raise RateLimitExceeded(retry_after=max(1, int(result[3])))
+            return True
+
+        allowed, _count, oldest = await _run_sliding_window(
+            key, now, self.window, self.requests
+        )
 
-        if request_count >= self.requests:
-            # Calculate retry-after
-            oldest = await redis.zrange(key, 0, 0, withscores=True)
-            if oldest:
-                retry_after = int(oldest[0][1] + self.window - now) + 1
+        if not allowed:
+            # Calculate retry-after from the oldest entry still in the window
+            oldest_score = float(oldest)
+            if oldest_score > 0:
+                retry_after = int(oldest_score + self.window - now) + 1
             else:
                 retry_after = self.window
             raise RateLimitExceeded(retry_after=retry_after)
@@ -95,20 +224,94 @@ class RateLimiter:
         """Get remaining requests in current window."""
         redis = get_redis()
         key = RedisKeys.rate_limit(identifier, endpoint)
-        now = datetime.utcnow().timestamp()
+        now = time.time()
         window_start = now - self.window
 
-        # Remove old entries and count
-        await redis.zremrangebyscore(key, 0, window_start)
-        count = await redis.zcard(key)
+        # Remove old entries and count in one round trip
+        pipe = redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(key, 0, window_start)
+        pipe.zcard(key)
+        _, count = await pipe.execute()
 
         return max(0, self.requests - count)
 
 
-# Pre-configured rate limiters
-default_limiter = RateLimiter(requests=100, window=60)      # 100/min
-strict_limiter = RateLimiter(requests=10, window=60)        # 10/min (for auth)
-lenient_limiter = RateLimiter(requests=1000, window=60)     # 1000/min (for reads)
+class FixedWindowLimiter:
+    """
+    Approximate sliding-window limiter built on plain INCR counters.
+
+    Each fixed window gets its own counter key; the effective count weights
+    the previous window by the unelapsed fraction of the current one
+    (Cloudflare-style), so a burst straddling a window boundary can't double
+    the allowance the way naive fixed windows do. Two O(1) counter ops per
+    check instead of zset bookkeeping — the right trade for high-volume
+    endpoints where a small approximation error is acceptable.
+    """
+
+    def __init__(self, requests: int, window: int):
+        """
+        Initialize rate limiter.
+
+        Args:
+            requests: Maximum number of requests allowed
+            window: Time window in seconds
+        """
+        self.requests = requests
+        self.window = window
+
+    def _bucket_keys(self, identifier: str, endpoint: str, now: float) -> tuple[str, str]:
+        base = RedisKeys.rate_limit(identifier, endpoint)
+        bucket = int(now // self.window)
+        return f"{base}:{bucket}", f"{base}:{bucket - 1}"
+
+    async def _weighted_count(self, identifier: str, endpoint: str, now: float, *, record: bool) -> float:
+        redis = get_redis()
+        key, prev_key = self._bucket_keys(identifier, endpoint, now)
+
+        pipe = redis.pipeline(transaction=False)
+        if record:
+            pipe.incr(key)
+            # Keep the counter around long enough to serve as "previous
+            # window" for the next bucket; nx so the TTL isn't reset per hit
+            pipe.expire(key, self.window * 2, nx=True)
+        else:
+            pipe.get(key)
+        pipe.get(prev_key)
+        results = await pipe.execute()
+        current = int(results[0] or 0)
+        prev = int(results[-1] or 0)
+
+        elapsed = (now % self.window) / self.window
+        return current + prev * (1.0 - elapsed)
+
+    async def check(self, identifier: str, endpoint: str = "global") -> bool:
+        """
+        Check if request is allowed.
+
+        Raises:
+            RateLimitExceeded if limit exceeded
+        """
+        now = time.time()
+        count = await self._weighted_count(identifier, endpoint, now, record=True)
+
+        if count > self.requests:
+            retry_after = int(self.window - (now % self.window)) + 1
+            raise RateLimitExceeded(retry_after=retry_after)
+
+        return True
+
+    async def get_remaining(self, identifier: str, endpoint: str = "global") -> int:
+        """Get remaining requests in current window."""
+        now = time.time()
+        count = await self._weighted_count(identifier, endpoint, now, record=False)
+        return max(0, self.requests - int(count))
+
+
+# Pre-configured rate limiters. Auth keeps the exact zset window; the
+# high-volume limiters use the cheaper counter approximation.
+default_limiter = FixedWindowLimiter(requests=100, window=60)   # 100/min
+strict_limiter = RateLimiter(requests=10, window=60)            # 10/min (for auth)
+lenient_limiter = FixedWindowLimiter(requests=1000, window=60)  # 1000/min (for reads)
 
 
 def get_client_identifier(request: Request) -> str:
@@ -116,23 +319,30 @@ def get_client_identifier(request: Request) -> str:
     Get unique identifier for rate limiting.
     Uses user ID if authenticated, otherwise IP address.
     """
-    # Check for authenticated user (set by auth middleware)
-    if hasattr(request.state, "user") and request.state.user:
-        return f"user:{request.state.user.id}"
+    # Computed once per request; later limiter checks reuse the cached value
+    cached = getattr(request.state, "_rl_id", None)
+    if cached is not None:
+        return cached
 
-    # Fall back to IP address
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        ip = forwarded.split(",")[0].strip()
+    # Check for authenticated user (set by auth middleware)
+    user = getattr(request.state, "user", None)
+    if user:
+        identifier = f"user:{user.id}"
     else:
-        ip = request.client.host if request.client else "unknown"
+        # Fall back to IP address
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            identifier = f"ip:{forwarded.partition(',')[0].strip()}"
+        else:
+            identifier = f"ip:{request.client.host if request.client else 'unknown'}"
 
-    return f"ip:{ip}"
+    request.state._rl_id = identifier
+    return identifier
 
 
 async def check_rate_limit(
     request: Request,
-    limiter: RateLimiter = default_limiter,
+    limiter: RateLimiter | FixedWindowLimiter = default_limiter,
 ) -> None:
     """
     Dependency to check rate limit.
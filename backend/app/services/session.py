@@ -3,53 +3,51 @@ Session management service for GMSTracker.
 Handles user session creation, validation, and cleanup.
 """
 
-import json
-import secrets
-from datetime import datetime, timedelta
+import binascii
+import os
+import time
 from uuid import UUID
 
+from redis.exceptions import ResponseError
+
 from app.redis import get_redis, RedisKeys
 from app.config import settings
 
 
+# base64 -> URL-safe alphabet for session tokens
+_B64_URLSAFE = bytes.maketrans(b"+/", b"-_")
+
 # Session settings
 SESSION_TTL_SECONDS = 60 * 60 * 24 * 7  # 7 days
 SESSION_TOKEN_BYTES = 32
+# Don't rewrite last_accessed more than once per minute; "touched recently"
+# is all the callers need and it keeps the validate path nearly write-free
+LAST_ACCESSED_WRITE_INTERVAL = 60
+# Only refresh the TTL once it has drifted more than this below the full
+# session TTL; a 7-day TTL doesn't need topping up on every request
+TTL_REFRESH_SLACK = 3600
 
 
 class SessionData:
-    """User session data stored in Redis."""
+    """
+    User session data stored in Redis.
+
+    Timestamps are epoch seconds; the hash stores them as-is, so reads and
+    writes involve no datetime formatting or parsing.
+    """
 
     def __init__(
         self,
         user_id: UUID,
         discord_id: str,
-        created_at: datetime | None = None,
-        last_accessed: datetime | None = None,
+        created_at: float | None = None,
+        last_accessed: float | None = None,
     ):
         self.user_id = user_id
         self.discord_id = discord_id
-        self.created_at = created_at or datetime.utcnow()
-        self.last_accessed = last_accessed or datetime.utcnow()
-
-    def to_dict(self) -> dict:
-        """Convert to dictionary for Redis storage."""
-        return {
-            "user_id": str(self.user_id),
-            "discord_id": self.discord_id,
-            "created_at": self.created_at.isoformat(),
-            "last_accessed": self.last_accessed.isoformat(),
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> "SessionData":
-        """Create from dictionary."""
-        return cls(
-            user_id=UUID(data["user_id"]),
-            discord_id=data["discord_id"],
-            created_at=datetime.fromisoformat(data["created_at"]),
-            last_accessed=datetime.fromisoformat(data["last_accessed"]),
-        )
+        now = time.time()
+        self.created_at = created_at if created_at is not None else now
+        self.last_accessed = last_accessed if last_accessed is not None else now
 
 
 class SessionService:
@@ -58,7 +56,11 @@ class SessionService:
     @staticmethod
     def generate_token() -> str:
         """Generate a secure session token."""
-        return secrets.token_urlsafe(SESSION_TOKEN_BYTES)
+        # Same output as secrets.token_urlsafe (os.urandom is the same
+        # entropy source) via one binascii C call instead of the base64
+        # module's wrapper layers
+        token = binascii.b2a_base64(os.urandom(SESSION_TOKEN_BYTES), newline=False)
+        return token.rstrip(b"=").translate(_B64_URLSAFE).decode("ascii")
 
     @staticmethod
     async def create(user_id: UUID, discord_id: str) -> str:
@@ -71,11 +73,21 @@ class SessionService:
         session = SessionData(user_id=user_id, discord_id=discord_id)
 
         key = RedisKeys.session(token)
-        await redis.setex(
-            key,
-            SESSION_TTL_SECONDS,
-            json.dumps(session.to_dict()),
-        )
+        index_key = RedisKeys.user_sessions(discord_id)
+        pipe = redis.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            "user_id": str(session.user_id),
+            "discord_id": session.discord_id,
+            "created_at": session.created_at,
+            "last_accessed": session.last_accessed,
+        })
+        pipe.expire(key, SESSION_TTL_SECONDS)
+        # Index the token so logout-everywhere is an O(sessions) lookup.
+        # The index outlives the sessions it references; stale members are
+        # simply no-op deletes later.
+        pipe.sadd(index_key, token)
+        pipe.expire(index_key, SESSION_TTL_SECONDS * 2)
+        await pipe.execute()
 
         return token
 
@@ -83,26 +95,47 @@ class SessionService:
     async def get(token: str) -> SessionData | None:
         """
         Get session data by token.
-        Updates last_accessed timestamp.
+        Refreshes the TTL and (at most once a minute) last_accessed.
         Returns None if session doesn't exist or is expired.
         """
         redis = get_redis()
         key = RedisKeys.session(token)
 
-        data = await redis.get(key)
-        if data is None:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hgetall(key)
+        pipe.ttl(key)
+        try:
+            data, ttl = await pipe.execute()
+        except ResponseError:
+            # Pre-hash sessions were JSON strings; HGETALL on one raises
+            # WRONGTYPE. Drop the stale key so the cookie just forces a
+            # clean re-login instead of erroring for the rest of its TTL.
+            await redis.delete(key)
+            return None
+        if not data:
             return None
 
-        session = SessionData.from_dict(json.loads(data))
-
-        # Update last accessed time and refresh TTL
-        session.last_accessed = datetime.utcnow()
-        await redis.setex(
-            key,
-            SESSION_TTL_SECONDS,
-            json.dumps(session.to_dict()),
+        session = SessionData(
+            user_id=UUID(data["user_id"]),
+            discord_id=data["discord_id"],
+            created_at=float(data["created_at"]),
+            last_accessed=float(data["last_accessed"]),
         )
 
+        # Both writes are debounced: last_accessed once a minute, the TTL
+        # once it has drifted by an hour. The common case issues nothing.
+        now = time.time()
+        touch = now - session.last_accessed > LAST_ACCESSED_WRITE_INTERVAL
+        refresh_ttl = ttl < SESSION_TTL_SECONDS - TTL_REFRESH_SLACK
+        if touch or refresh_ttl:
+            pipe = redis.pipeline(transaction=False)
+            if touch:
+                session.last_accessed = now
+                pipe.hset(key, "last_accessed", now)
+            if refresh_ttl:
+                pipe.expire(key, SESSION_TTL_SECONDS)
+            await pipe.execute()
+
         return session
 
     @staticmethod
@@ -113,28 +146,40 @@ class SessionService:
         """
         redis = get_redis()
         key = RedisKeys.session(token)
-        result = await redis.delete(key)
-        return result > 0
+
+        try:
+            discord_id = await redis.hget(key, "discord_id")
+        except ResponseError:
+            # Legacy JSON-string session from before the hash migration;
+            # it was never indexed, so deleting the key is the whole logout
+            return await redis.delete(key) > 0
+        if discord_id is None:
+            return False
+
+        pipe = redis.pipeline(transaction=False)
+        pipe.delete(key)
+        pipe.srem(RedisKeys.user_sessions(discord_id), token)
+        results = await pipe.execute()
+        return results[0] > 0
 
     @staticmethod
     async def delete_all_for_user(discord_id: str) -> int:
         """
         Delete all sessions for a user (logout everywhere).
         Returns count of deleted sessions.
-
-        Note: This requires scanning all session keys, which can be slow.
-        Consider maintaining a user->sessions index for production.
         """
         redis = get_redis()
-        pattern = f"{RedisKeys.SESSION}*"
-        deleted = 0
-
-        async for key in redis.scan_iter(match=pattern):
-            data = await redis.get(key)
-            if data:
-                session = json.loads(data)
-                if session.get("discord_id") == discord_id:
-                    await redis.delete(key)
-                    deleted += 1
-
-        return deleted
+        index_key = RedisKeys.user_sessions(discord_id)
+
+        tokens = await redis.smembers(index_key)
+        if not tokens:
+            return 0
+
+        pipe = redis.pipeline(transaction=False)
+        for token in tokens:
+            pipe.delete(RedisKeys.session(token))
+        pipe.delete(index_key)
+        results = await pipe.execute()
+
+        # Last result is the index delete; the rest count live sessions
+        return sum(results[:-1])
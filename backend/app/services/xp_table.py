@@ -4,8 +4,8 @@ XP Table service - loads and provides XP requirements per level.
 
 import csv
 from pathlib import Path
-from decimal import Decimal
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
 # Load XP table data
 # Priority:
@@ -22,33 +22,48 @@ else:
     # Main app setup (go up: services -> app -> backend -> maplestuff)
     XP_TABLE_PATH = Path(__file__).parent.parent.parent.parent / "Xp" / "XP_Table.csv"
 
-_xp_table_cache: Dict[int, Dict[str, Decimal]] = {}
+# Frozen after the first successful load; the table is read-only from then
+# on, so every later call is a single None check and no caller can mutate
+# the shared rows. Loading stays lazy (not at import) because the CSV is an
+# optional mount — routes degrade gracefully on FileNotFoundError and an
+# import-time read would turn that into a boot failure.
+_xp_table: Optional[Mapping[int, Mapping[str, float]]] = None
 
 
-def load_xp_table() -> Dict[int, Dict[str, Decimal]]:
-    """Load XP table from CSV file."""
-    global _xp_table_cache
-    
-    if _xp_table_cache:
-        return _xp_table_cache
-    
+def load_xp_table() -> Mapping[int, Mapping[str, float]]:
+    """Load XP table from CSV file (once; the result is immutable)."""
+    global _xp_table
+
+    if _xp_table is not None:
+        return _xp_table
+
     if not XP_TABLE_PATH.exists():
         raise FileNotFoundError(f"XP table not found at {XP_TABLE_PATH}")
-    
-    with open(XP_TABLE_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+
+    table: Dict[int, Mapping[str, float]] = {}
+    with open(XP_TABLE_PATH, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        # Resolve column positions from the header once, then index rows
+        # positionally — no per-row dict like DictReader builds
+        header = next(reader)
+        level_idx = header.index('Level')
+        actual_idx = header.index('XP Required (Actual)')
         for row in reader:
-            level = int(row['Level'])
-            _xp_table_cache[level] = {
-                'actual': Decimal(row['XP Required (Actual)']),
-                'billions': Decimal(row['XP Required (Billions)']),
-                'trillions': Decimal(row['XP Required (Trillions)']),
-            }
-    
-    return _xp_table_cache
+            level = int(row[level_idx])
+            actual = float(row[actual_idx])
+            # Billions/trillions are pure unit conversions; deriving them
+            # beats parsing two more columns per row
+            table[level] = MappingProxyType({
+                'actual': actual,
+                'billions': actual * 1e-9,
+                'trillions': actual * 1e-12,
+            })
 
+    _xp_table = MappingProxyType(table)
+    return _xp_table
 
-def get_xp_for_level(level: int) -> Dict[str, Decimal]:
+
+def get_xp_for_level(level: int) -> Mapping[str, float]:
     """Get XP requirements for a specific level."""
     table = load_xp_table()
     if level not in table:
@@ -56,16 +71,16 @@ def get_xp_for_level(level: int) -> Dict[str, Decimal]:
     return table[level]
 
 
-def calculate_xp_gained(level: int, old_percent: Decimal, new_percent: Decimal) -> Dict[str, Decimal]:
+def calculate_xp_gained(level: int, old_percent, new_percent) -> Dict[str, float]:
     """Calculate XP gained from percentage difference."""
-    xp_data = get_xp_for_level(level)
-    xp_required = xp_data['actual']
-    
-    percent_diff = new_percent - old_percent
-    xp_gained_actual = (xp_required * percent_diff) / Decimal('100')
-    
+    xp_required = get_xp_for_level(level)['actual']
+
+    # Plain float math; XP values fit comfortably in a double and the
+    # callers round for display anyway
+    xp_gained_actual = xp_required * (float(new_percent) - float(old_percent)) * 0.01
+
     return {
         'actual': xp_gained_actual,
-        'billions': xp_gained_actual / Decimal('1000000000'),
-        'trillions': xp_gained_actual / Decimal('1000000000000'),
+        'billions': xp_gained_actual * 1e-9,
+        'trillions': xp_gained_actual * 1e-12,
     }
@@ -4,9 +4,10 @@ Run with: python -m seeds.seed_db
 """
 
 import asyncio
-import json
 from pathlib import Path
 
+import orjson
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,28 +17,36 @@ from app.models import Boss, Item, BossDropTable
 
 SEEDS_DIR = Path(__file__).parent
 
+# Prefetch statements, built once at import. The per-row existence SELECTs
+# these used to accompany were removed when the loaders switched to
+# prefetched lookup dicts, so these run exactly once per seed pass.
+_EXISTING_BOSSES_STMT = select(Boss.name, Boss.difficulty, Boss.id)
+_EXISTING_ITEMS_STMT = select(Item.name, Item.id)
+_EXISTING_DROPS_STMT = select(BossDropTable.boss_id, BossDropTable.item_id)
+
+
+def _read_seed_file(name: str) -> dict:
+    """Parse a seed JSON file (orjson works on raw bytes, no text decode)."""
+    return orjson.loads((SEEDS_DIR / name).read_bytes())
 
-async def load_bosses(session: AsyncSession) -> dict[str, int]:
-    """Load bosses from JSON and return name+difficulty -> id mapping."""
-    with open(SEEDS_DIR / "bosses.json") as f:
-        data = json.load(f)
+
+async def load_bosses(session: AsyncSession, bosses: list[dict]) -> dict[str, int]:
+    """Load bosses and return name+difficulty -> id mapping."""
+    # Prefetch existing rows once instead of a SELECT per seed row
+    result = await session.execute(_EXISTING_BOSSES_STMT)
+    existing_ids = {(name, difficulty): id for name, difficulty, id in result}
 
     boss_map = {}
-    for boss_data in data["bosses"]:
-        # Check if boss already exists
-        result = await session.execute(
-            select(Boss).where(
-                Boss.name == boss_data["name"],
-                Boss.difficulty == boss_data.get("difficulty"),
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            boss_map[f"{boss_data['name']}|{boss_data.get('difficulty')}"] = existing.id
+    new_bosses = []
+    for boss_data in bosses:
+        key = f"{boss_data['name']}|{boss_data.get('difficulty')}"
+
+        existing_id = existing_ids.get((boss_data["name"], boss_data.get("difficulty")))
+        if existing_id is not None:
+            boss_map[key] = existing_id
             continue
 
-        boss = Boss(
+        new_bosses.append((key, Boss(
             name=boss_data["name"],
             difficulty=boss_data.get("difficulty"),
             reset_type=boss_data["reset_type"],
@@ -46,44 +55,48 @@ async def load_bosses(session: AsyncSession) -> dict[str, int]:
             image_url=boss_data.get("image_url"),
             sort_order=boss_data.get("sort_order", 0),
             is_active=True,
-        )
-        session.add(boss)
+        )))
+
+    if new_bosses:
+        # One batched INSERT instead of a flush round trip per row
+        session.add_all([boss for _, boss in new_bosses])
         await session.flush()
-        boss_map[f"{boss_data['name']}|{boss_data.get('difficulty')}"] = boss.id
+        for key, boss in new_bosses:
+            boss_map[key] = boss.id
 
     await session.commit()
     print(f"Loaded {len(boss_map)} bosses")
     return boss_map
 
 
-async def load_items(session: AsyncSession) -> dict[str, int]:
-    """Load items from JSON and return name -> id mapping."""
-    with open(SEEDS_DIR / "items.json") as f:
-        data = json.load(f)
+async def load_items(session: AsyncSession, items: list[dict]) -> dict[str, int]:
+    """Load items and return name -> id mapping."""
+    # Prefetch existing rows once instead of a SELECT per seed row
+    result = await session.execute(_EXISTING_ITEMS_STMT)
+    existing_ids = dict(result.all())
 
     item_map = {}
-    for item_data in data["items"]:
-        # Check if item already exists
-        result = await session.execute(
-            select(Item).where(Item.name == item_data["name"])
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            item_map[item_data["name"]] = existing.id
+    new_items = []
+    for item_data in items:
+        existing_id = existing_ids.get(item_data["name"])
+        if existing_id is not None:
+            item_map[item_data["name"]] = existing_id
             continue
 
-        item = Item(
+        new_items.append(Item(
             name=item_data["name"],
             category=item_data.get("category"),
             subcategory=item_data.get("subcategory"),
             rarity=item_data.get("rarity"),
             image_url=item_data.get("image_url"),
             is_active=True,
-        )
-        session.add(item)
+        ))
+
+    if new_items:
+        session.add_all(new_items)
         await session.flush()
-        item_map[item_data["name"]] = item.id
+        for item in new_items:
+            item_map[item.name] = item.id
 
     await session.commit()
     print(f"Loaded {len(item_map)} items")
@@ -92,15 +105,17 @@ async def load_items(session: AsyncSession) -> dict[str, int]:
 
 async def load_drop_tables(
     session: AsyncSession,
+    drop_tables: list[dict],
     boss_map: dict[str, int],
     item_map: dict[str, int],
 ) -> int:
-    """Load boss drop tables from JSON."""
-    with open(SEEDS_DIR / "boss_drop_tables.json") as f:
-        data = json.load(f)
+    """Load boss drop tables."""
+    # Prefetch existing (boss_id, item_id) pairs once
+    result = await session.execute(_EXISTING_DROPS_STMT)
+    existing_pairs = set(result.all())
 
-    count = 0
-    for entry in data["drop_tables"]:
+    new_entries = []
+    for entry in drop_tables:
         boss_key = f"{entry['boss']['name']}|{entry['boss'].get('difficulty')}"
         boss_id = boss_map.get(boss_key)
 
@@ -115,40 +130,36 @@ async def load_drop_tables(
                 print(f"Warning: Item not found: {drop['item']}")
                 continue
 
-            # Check if drop table entry already exists
-            result = await session.execute(
-                select(BossDropTable).where(
-                    BossDropTable.boss_id == boss_id,
-                    BossDropTable.item_id == item_id,
-                )
-            )
-            existing = result.scalar_one_or_none()
-
-            if existing:
+            if (boss_id, item_id) in existing_pairs:
                 continue
 
-            drop_entry = BossDropTable(
+            new_entries.append(BossDropTable(
                 boss_id=boss_id,
                 item_id=item_id,
                 is_guaranteed=drop.get("is_guaranteed", False),
-            )
-            session.add(drop_entry)
-            count += 1
+            ))
 
+    if new_entries:
+        session.add_all(new_entries)
     await session.commit()
-    print(f"Loaded {count} drop table entries")
-    return count
+    print(f"Loaded {len(new_entries)} drop table entries")
+    return len(new_entries)
 
 
 async def seed_database():
     """Run all seed operations."""
     print("Starting database seed...")
 
+    # Parse each seed file exactly once
+    bosses = _read_seed_file("bosses.json")["bosses"]
+    items = _read_seed_file("items.json")["items"]
+    drop_tables = _read_seed_file("boss_drop_tables.json")["drop_tables"]
+
     async with async_session_maker() as session:
         # Load in order due to foreign key dependencies
-        boss_map = await load_bosses(session)
-        item_map = await load_items(session)
-        await load_drop_tables(session, boss_map, item_map)
+        boss_map = await load_bosses(session, bosses)
+        item_map = await load_items(session, items)
+        await load_drop_tables(session, drop_tables, boss_map, item_map)
 
     print("Database seed complete!")
 